@@ -1,7 +1,10 @@
 from fastapi import APIRouter, status, BackgroundTasks, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.schema.user import UserSignIn, UserSignUp
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.schema.user import UserSignIn, UserSignUp, RefreshToken
 
 from app.core.models.user import User
 from app.core.models.organisation import Organisation
@@ -11,36 +14,44 @@ from app.core.models.member import Member
 from app.core.utils.auth import (
     create_access_token, 
     create_refresh_token,
-    create_user,
-    create_user_resources,
-    verify_user,
-    check_user_exists,
+    decode_refresh_token,
+    sign_up_user_async,
+    verify_user_async,
 )
-from app.core.utils.dependencies import get_db
+from app.core.utils.admission import hashing_admission
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.errors import credential_error
+from app.core.utils.middlewares import load_principal
+from app.core.utils.query_budget import query_budget
+from app.core.utils.revocation import revocation_list, revoke_token
 from app.core.utils.mailers import send_login_email
 
+load_dotenv()
+
+REFRESH_TOKEN_ROTATION = getenv("REFRESH_TOKEN_ROTATION", "true").lower() == "true"
+
 router = APIRouter(
     prefix="/auth",
     tags=["Auth"]
 )
 
-@router.post("/sign-in", status_code=status.HTTP_200_OK)
+@router.post("/sign-in", status_code=status.HTTP_200_OK, dependencies=[Depends(hashing_admission.dependency), query_budget(1)])
 async def sign_in(
     background_tasks: BackgroundTasks,
     payload: UserSignIn, 
-    db: Session = Depends(get_db),  
+    db: AsyncSession = Depends(get_db_async),  
 ):
     """
     Sign in the user.
     
     Args:
     user (UserSignIn) : User sign in details.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
     
     Returns:
     dict : Access token, refresh token and token type.
     """
-    user = verify_user(db, payload.email, payload.password)
+    user = await verify_user_async(db, payload.email, payload.password)
     access_token = create_access_token(data={"sub": user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
 
@@ -56,26 +67,70 @@ async def sign_in(
     }
 
 
-@router.post("/sign-up", status_code=status.HTTP_201_CREATED)
+@router.post("/refresh", status_code=status.HTTP_200_OK, dependencies=[query_budget(2)])
+async def refresh(
+    payload: RefreshToken,
+    db: AsyncSession = Depends(get_db_async),
+):
+    """
+    Exchange a refresh token for a new access token.
+
+    No password is checked and no login email is sent. When refresh token
+    rotation is enabled a new refresh token is issued as well, and the one
+    presented is revoked.
+
+    Args:
+    payload (RefreshToken) : Refresh token.
+    db (AsyncSession) : Async database session.
+
+    Returns:
+    dict : Access token, refresh token and token type.
+    """
+    token_data = decode_refresh_token(payload.refresh_token)
+    if not token_data or "sub" not in token_data:
+        raise credential_error()
+    if revocation_list.is_revoked(token_data.get("jti"), token_data["sub"], token_data.get("iat", 0)):
+        raise credential_error()
+
+    principal = await load_principal(db, token_data["sub"])
+    access_token = create_access_token(data={"sub": principal.email})
+    refresh_token = payload.refresh_token
+    if REFRESH_TOKEN_ROTATION:
+        refresh_token = create_refresh_token(data={"sub": principal.email})
+        if token_data.get("jti"):
+            revocation = revoke_token(db, token_data["jti"], token_data["exp"])
+            await db.commit()
+            revocation_list.apply(revocation)
+
+    return {
+        "message": "Access token refreshed successfully",
+        "data": {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer"
+        }
+    }
+
+
+@router.post("/sign-up", status_code=status.HTTP_201_CREATED, dependencies=[Depends(hashing_admission.dependency), query_budget(6)])
 async def sign_up(
     payload: UserSignUp, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async)
 ):
     """
     Sign up the user.
 
     Args:
     user (UserSignUp) : User sign up details.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
 
     Returns:
     dict : Message and data.
     """
 
-    check_user_exists(db, payload.email)
-    
-    user_id = create_user(db, payload.email, payload.password)
-    organization_id = create_user_resources(db, user_id, payload.organisation_name)
+    user_id, organization_id = await sign_up_user_async(
+        db, payload.email, payload.password, payload.organisation_name
+    )
     
     return {
         "message": "User signed up successfully", 
@@ -1,22 +1,29 @@
 from fastapi import APIRouter,Request, BackgroundTasks, status, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
 from app.core.models.organisation import Organisation
 from app.core.models.invites import Invite
 from app.core.models.member import Member
-from app.core.models.role import Role
 from app.core.models.user import User
 
-from app.core.schema.member import InviteMember
+from app.core.schema.member import InviteMember, BulkInviteMembers
 
-from app.core.utils.dependencies import get_db
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.query_budget import query_budget
 from app.core.utils.invitation import create_invite_token, verify_invite_token
-from app.core.utils.errors import not_found_error, unauthorized_error
+from app.core.utils.errors import not_found_error, validation_error
 from app.core.utils.middlewares import authenticate_user
+from app.core.utils.roles import role_directory
 from app.core.utils.mailers import send_invite_email
-from app.core.utils.dependencies import save_and_refresh
-from app.core.utils.cron import schedule_email
+from app.core.utils.membership import is_member
+from app.core.utils.permissions import Permission, Authorizer, get_authorizer
+from app.core.utils.dependencies import save_and_refresh_async
+from app.core.utils.cron import schedule_email, schedule_emails
+from app.core.utils.stats import record_member_change_async
+
+BULK_INVITE_LIMIT = 5000
 
 router = APIRouter(
     dependencies=[Depends(authenticate_user)],
@@ -24,11 +31,27 @@ router = APIRouter(
     tags=["Invitations"]
 )
 
-@router.post("/send", status_code= status.HTTP_200_OK)
+def invite_email(invite_token: str):
+    """
+    Build the subject and body of an invite email.
+
+    Args:
+    invite_token (str) : Invite token.
+
+    Returns:
+    tuple : Subject and body of the email.
+    """
+    return (
+        "Invite to join organisation",
+        f"Click the link to join the organisation: http://localhost:8000/invitations/accept?invite_id={invite_token}",
+    )
+
+@router.post("/send", status_code= status.HTTP_200_OK, dependencies=[query_budget(5)])
 async def send_invite(
     request: Request,
     payload: InviteMember, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
 ):
     """
     Send invite to join the organisation.
@@ -37,20 +60,18 @@ async def send_invite(
     background_tasks (BackgroundTasks) : Background task.
     request (Request) : Request object.
     payload (InviteMember) : InviteMember schema.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
     
     Returns:
     dict : Message that invite is sent.
     """
     
-    user = request.state.user
-
-    organisation = db.query(Organisation).filter(Organisation.id == payload.organisation_id).first()
+    organisation = await db.get(Organisation, payload.organisation_id)
     if not organisation:
         raise not_found_error("Organisation")
     
-    if user.id not in [member.user_id for member in organisation.memberships]:
-        raise unauthorized_error()
+    authorizer.require(organisation.id, Permission.INVITE_MEMBERS)
     
     invite = Invite(
         email= payload.recipient_mail, 
@@ -58,29 +79,118 @@ async def send_invite(
         created_at=datetime.utcnow(),
         expires_at=datetime.utcnow() + timedelta(days=7))
     db.add(invite)
-    db.commit()
+    await db.commit()
 
     invite_token = create_invite_token(payload.recipient_mail, invite.id)
 
     schedule_time = datetime.utcnow() + timedelta(minutes=10)
-    schedule_email(payload.recipient_mail,
-     "Invite to join organisation", 
-     f"Click the link to join the organisation: http://localhost:8000/invitations/accept?invite_id={invite_token}", 
-     schedule_time)
+    schedule_email(payload.recipient_mail, *invite_email(invite_token), schedule_time)
 
     return {"message": f"Invite sent to {payload.recipient_mail}"}
 
-@router.get("/accept", status_code= status.HTTP_200_OK)
+@router.post("/send-bulk", status_code= status.HTTP_200_OK, dependencies=[query_budget(7)])
+async def send_bulk_invites(
+    request: Request,
+    payload: BulkInviteMembers,
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
+):
+    """
+    Send invites to join the organisation to several recipients at once.
+
+    Recipients that already have a pending invite or are already members are
+    skipped. The remaining invites are inserted in one statement and their
+    emails are scheduled as one batch.
+
+    Args:
+    request (Request) : Request object.
+    payload (BulkInviteMembers) : BulkInviteMembers schema.
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
+
+    Returns:
+    dict : Message and the outcome for every recipient.
+    """
+
+    if len(payload.recipient_mails) > BULK_INVITE_LIMIT:
+        raise validation_error("recipient_mails")
+
+    organisation = await db.get(Organisation, payload.organisation_id)
+    if not organisation:
+        raise not_found_error("Organisation")
+
+    authorizer.require(organisation.id, Permission.INVITE_MEMBERS)
+
+    now = datetime.utcnow()
+    emails = [email.strip() for email in payload.recipient_mails]
+    recipients = list(dict.fromkeys(emails))
+
+    pending = set(await db.scalars(
+        select(Invite.email).where(
+            Invite.organisation_id == organisation.id,
+            Invite.status == "pending",
+            Invite.expires_at >= now,
+            Invite.email.in_(recipients),
+        )
+    ))
+    members = set(await db.scalars(
+        select(User.email)
+        .join(Member, Member.user_id == User.id)
+        .where(Member.org_id == organisation.id, User.email.in_(recipients))
+    ))
+
+    outcomes = {email: "already_invited" for email in pending}
+    outcomes.update({email: "already_member" for email in members})
+    new_recipients = [email for email in recipients if email not in outcomes]
+
+    if new_recipients:
+        rows = await db.execute(
+            insert(Invite).returning(Invite.id, Invite.email),
+            [
+                {
+                    "email": email,
+                    "organisation_id": organisation.id,
+                    "status": "pending",
+                    "created_at": now,
+                    "expires_at": now + timedelta(days=7),
+                }
+                for email in new_recipients
+            ],
+        )
+        invite_ids = {row.email: row.id for row in rows}
+        await db.commit()
+
+        schedule_emails(
+            [
+                (email, *invite_email(create_invite_token(email, invite_ids[email])))
+                for email in new_recipients
+            ],
+            now + timedelta(minutes=10),
+        )
+        outcomes.update({email: "invited" for email in new_recipients})
+
+    results = []
+    seen = set()
+    for email in emails:
+        results.append({"email": email, "status": "duplicate" if email in seen else outcomes[email]})
+        seen.add(email)
+
+    return {
+        "message": f"{len(new_recipients)} invites sent",
+        "results": results,
+    }
+
+@router.get("/accept", status_code= status.HTTP_200_OK, dependencies=[query_budget(8)])
 async def accept_invite(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async)
 ):
     """
     Accept invite to join the organisation.
     
     Args:
     request (Request) : Request object.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
     
     Returns:
     dict : Message that invite is accepted
@@ -91,42 +201,42 @@ async def accept_invite(
     invite_id = token_data.get('invite_id')
     user_email = token_data.get('email')
 
-    user = db.query(User).filter(User.email == user_email).first()
+    user = await db.scalar(select(User).where(User.email == user_email))
     if not user:
         return {"message": "Please create an account to accept this invite!"}
 
-    invite = db.query(Invite).filter(Invite.id == invite_id).first()
-    if not invite or invite.status != "pending" or invite.expires_at < datetime.utcnow():
+    # Swept invite ids can be reused, so the token must also name the invitee.
+    invite = await db.get(Invite, invite_id)
+    if not invite or invite.email != user_email or invite.status != "pending" or invite.expires_at < datetime.utcnow():
         return {"message": "Invalid or expired invite!"}
     
-    membership = db.query(Member).filter(Member.user_id == request.state.user.id, Member.org_id == invite.organisation_id).first()
-    if membership:
+    if await is_member(request, db, invite.organisation_id):
         return {"message": "You are already a member of this organisation!"}
     
-    role = db.query(Role).filter(Role.name == "member").first()
-    if not role:
-        role = Role(name="member", description="Default role for members", org_id=invite.organisation_id)
-        save_and_refresh(db, role)
+    role_id = await role_directory.resolve(db, invite.organisation_id, "member")
+    if role_id is None:
+        raise not_found_error("Role")
     
-    member = Member(user_id=user.id, org_id=invite.organisation_id, role_id=role.id, status=1)
-    save_and_refresh(db,member)
+    await record_member_change_async(db, invite.organisation_id, role_id, 1, 1)
+    member = Member(user_id=user.id, org_id=invite.organisation_id, role_id=role_id, status=1)
+    await save_and_refresh_async(db, member)
 
     invite.status = "accepted"
-    db.commit()
+    await db.commit()
 
     return {"message": "Invite accepted successfully"}
 
-@router.get("/cancel", status_code= status.HTTP_200_OK)
+@router.get("/cancel", status_code= status.HTTP_200_OK, dependencies=[query_budget(2)])
 async def cancel_invite(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async)
 ):
     """
     Cancel invite to join the organisation.
 
     Args:
     request (Request) : Request object.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
 
     Returns:
     dict : Message that invite is cancelled
@@ -135,12 +245,13 @@ async def cancel_invite(
     invite_token = request.query_params.get("invite_id")
     token_data = verify_invite_token(invite_token)
     invite_id = token_data.get('invite_id')
+    user_email = token_data.get('email')
 
-    invite = db.query(Invite).filter(Invite.id == invite_id).first()
-    if not invite or invite.status != "pending" or invite.expires_at < datetime.utcnow():
+    invite = await db.get(Invite, invite_id)
+    if not invite or invite.email != user_email or invite.status != "pending" or invite.expires_at < datetime.utcnow():
         return {"message": "Invalid or expired invite!"}
     
-    db.delete(invite)
-    db.commit()
+    await db.delete(invite)
+    await db.commit()
 
     return {"message": "Invite cancelled successfully"}
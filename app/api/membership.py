@@ -1,14 +1,25 @@
-from fastapi import APIRouter, status, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Request, status, Depends, Query
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models.member import Member
+from app.core.models.user import User
 from app.core.models.role import Role
 
-from app.core.schema.member import UpdateRole
+from app.core.schema.member import UpdateRole, BulkUpdateRole, BulkDeleteMembers
 
-from app.core.utils.dependencies import get_db
-from app.core.utils.errors import not_found_error
-from app.core.utils.middlewares import authenticate_user
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.query_budget import query_budget
+from app.core.utils.errors import not_found_error, validation_error, last_manager_error
+from app.core.utils.middlewares import authenticate_user, invalidate_principal
+from app.core.utils.pagination import encode_cursor, decode_cursor
+from app.core.utils.permissions import Permission, Authorizer, get_authorizer
+from app.core.utils.roles import role_directory
+from app.core.utils.stats import record_member_change_async, record_member_changes_async
+
+BULK_MEMBER_LIMIT = 5000
+MEMBER_PAGE_SIZE = 100
+MEMBER_MAX_PAGE_SIZE = 1000
 
 router = APIRouter(
     prefix="/member",
@@ -16,58 +27,360 @@ router = APIRouter(
     dependencies=[Depends(authenticate_user)]
 )
 
-@router.post("/update-role", status_code=status.HTTP_200_OK)
+@router.get("/list", status_code=status.HTTP_200_OK, dependencies=[query_budget(4)])
+async def list_members(
+    org_id: int,
+    status: int = None,
+    role: str = None,
+    cursor: str = None,
+    limit: int = Query(MEMBER_PAGE_SIZE, ge=1, le=MEMBER_MAX_PAGE_SIZE),
+    fields: str = None,
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
+):
+    """
+    List the members of an organisation, one page at a time.
+
+    Members are read in id order with one query that selects only the
+    requested fields, joining the user and role only when their columns are
+    requested. Pass the returned next_cursor back as cursor to fetch the
+    next page. Needs the view members permission in the organisation.
+
+    Args:
+    org_id (int) : Organisation id.
+    status (int) : Membership status.
+    role (str) : Name of role.
+    cursor (str) : Cursor returned with the previous page.
+    limit (int) : Page size.
+    fields (str) : Comma separated fields to return. (id, user_id, email, role, status, created_at)
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
+
+    Returns:
+    dict : Members of the page and the cursor of the next page, if any.
+    """
+    authorizer.require(org_id, Permission.VIEW_MEMBERS)
+
+    columns = {
+        "id": Member.id,
+        "user_id": Member.user_id,
+        "email": User.email,
+        "role": Role.name,
+        "status": Member.status,
+        "created_at": Member.created_at,
+    }
+    selected = fields.split(",") if fields else ["id", "email", "role", "status"]
+    if any(field not in columns for field in selected):
+        raise validation_error("fields")
+
+    query = select(Member.id.label("member_id"), *(columns[field].label(field) for field in selected))\
+              .where(Member.org_id == org_id)
+    if "email" in selected:
+        query = query.join(User, User.id == Member.user_id)
+    if "role" in selected:
+        query = query.join(Role, Role.id == Member.role_id)
+
+    if status is not None:
+        query = query.where(Member.status == status)
+    if role is not None:
+        role_id = await role_directory.resolve(db, org_id, role)
+        if role_id is None:
+            raise not_found_error("Role")
+        query = query.where(Member.role_id == role_id)
+    if cursor:
+        last_id, = decode_cursor(cursor, [int])
+        query = query.where(Member.id > last_id)
+
+    rows = (await db.execute(query.order_by(Member.id).limit(limit))).all()
+
+    next_cursor = encode_cursor([rows[-1].member_id]) if len(rows) == limit else None
+    return {
+        "message": "Members fetched successfully!",
+        "members": [tuple(row._mapping[field] for field in selected) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+@router.post("/update-role", status_code=status.HTTP_200_OK, dependencies=[query_budget(9)])
 async def update_member_role(
+    request: Request,
     payload: UpdateRole, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
 ):
     """
     Update member role.
 
+    The member is moved to the role of their organisation with the given
+    name; the role itself is left unchanged. The organisation's last member
+    holding the manage roles permission cannot be moved to a role without it.
+    Needs the manage roles permission in that organisation.
+
     Args:
+    request (Request) : Request object.
     payload (UpdateRole) : Payload containing member id and role name.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
 
     Returns:
     dict : Message that member role is updated successfully.
     """
-    member = db.query(Member).filter(Member.id == payload.member_id).first()
+    member = await db.get(Member, payload.member_id)
     if not member:
         raise not_found_error("Member")
- 
-    role = db.query(Role.id).filter(Role.id == member.role_id).first()
-    if not role:
+
+    authorizer.require(member.org_id, Permission.MANAGE_ROLES)
+
+    role_id = await role_directory.resolve(db, member.org_id, payload.role_name)
+    if role_id is None:
         raise not_found_error("Role")
-    
-    role_id = role.id
-  
-    db.query(Role).filter(Role.id == role_id).update({Role.name: payload.role_name})
-    
-    member.role_id = role_id
-    db.commit()
+
+    if role_id != member.role_id:
+        bitsets = await role_directory.permissions(db, [(member.org_id, role_id)])
+        if not bitsets.get((member.org_id, role_id), 0) & Permission.MANAGE_ROLES:
+            managers = await lock_managers(db, member.org_id)
+            if not spare_last_managers(managers, [member.id], {}):
+                raise last_manager_error()
+
+        await record_member_change_async(db, member.org_id, member.role_id, member.status, -1)
+        await record_member_change_async(db, member.org_id, role_id, member.status, 1)
+        member.role_id = role_id
+        await db.commit()
 
     return {"message": "Member role updated successfully"}
 
-@router.delete("/delete/{member_id}", status_code=status.HTTP_200_OK)
+@router.delete("/delete/{member_id}", status_code=status.HTTP_200_OK, dependencies=[query_budget(7)])
 async def delete_member(
+    request: Request,
     member_id: int, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
 ):
     """
-    Delete a member.
+    Delete a member. The organisation's last member holding the manage roles
+    permission cannot be deleted. Needs the remove members permission in
+    their organisation.
 
     Args:
+    request (Request) : Request object.
     member_id (int) : Member id.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
 
     Returns:
     dict : Message that member is deleted successfully.
     """
-    member = db.query(Member).filter(Member.id == member_id).first()
+    member = await db.get(Member, member_id)
     if not member:
         raise not_found_error("Member")
 
-    db.delete(member)
-    db.commit()
+    authorizer.require(member.org_id, Permission.REMOVE_MEMBERS)
+
+    managers = await lock_managers(db, member.org_id)
+    if not spare_last_managers(managers, [member.id], {}):
+        raise last_manager_error()
+
+    email = await db.scalar(select(User.email).where(User.id == member.user_id))
+    await record_member_change_async(db, member.org_id, member.role_id, member.status, -1)
+    await db.delete(member)
+    await db.commit()
+    invalidate_principal(email)
 
     return {"message": "Member deleted successfully"}
+
+def bulk_results(member_ids: list, outcomes: dict):
+    """
+    List the outcome of every requested member id, in request order.
+
+    Args:
+    member_ids (list) : Requested member ids, possibly repeated.
+    outcomes (dict) : Outcome keyed by member id.
+
+    Returns:
+    list : Member id and status of every requested id.
+    """
+    results = []
+    seen = set()
+    for member_id in member_ids:
+        results.append({"member_id": member_id, "status": "duplicate" if member_id in seen else outcomes[member_id]})
+        seen.add(member_id)
+    return results
+
+async def lock_managers(db: AsyncSession, org_id: int):
+    """
+    Get and lock the members of an organisation whose role grants the manage roles permission.
+
+    Bulk calls take this lock before touching any member, so two concurrent
+    calls cannot each remove a different one of the last managers.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    org_id (int) : Organisation id.
+
+    Returns:
+    set : Member ids.
+    """
+    return set(await db.scalars(
+        select(Member.id)
+        .join(Role, Role.id == Member.role_id)
+        .where(Member.org_id == org_id, Role.permissions.op("&")(int(Permission.MANAGE_ROLES)) != 0)
+        .with_for_update(of=Member)
+    ))
+
+def spare_last_managers(managers: set, removed: list, outcomes: dict):
+    """
+    Keep back the managers a bulk call would remove when none would be left.
+
+    Args:
+    managers (set) : Ids of the members holding the manage roles permission.
+    removed (list) : Ids of the members the call would remove or move.
+    outcomes (dict) : Outcome keyed by member id, updated for the kept members.
+
+    Returns:
+    list : Ids of the members that can be removed or moved.
+    """
+    if not managers or managers - set(removed):
+        return removed
+    for member_id in managers:
+        outcomes[member_id] = "last_manager"
+    return [member_id for member_id in removed if member_id not in managers]
+
+@router.post("/update-role-bulk", status_code=status.HTTP_200_OK, dependencies=[query_budget(8)])
+async def update_member_roles(
+    payload: BulkUpdateRole,
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
+):
+    """
+    Move several members of an organisation to a role at once.
+
+    The members are read and locked with one query, moved with one UPDATE
+    and their counters adjusted with one statement, all in one transaction.
+    When the role does not grant the manage roles permission, members that
+    are the organisation's last managers are not moved and are reported as
+    last_manager. Needs the manage roles permission in the organisation.
+
+    Args:
+    payload (BulkUpdateRole) : Payload containing organisation id, member ids and role name.
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
+
+    Returns:
+    dict : Message and the outcome for every member id.
+    """
+    if len(payload.member_ids) > BULK_MEMBER_LIMIT:
+        raise validation_error("member_ids")
+
+    org_id = payload.organisation_id
+    authorizer.require(org_id, Permission.MANAGE_ROLES)
+
+    role_id = await role_directory.resolve(db, org_id, payload.role_name)
+    if role_id is None:
+        raise not_found_error("Role")
+
+    bitsets = await role_directory.permissions(db, [(org_id, role_id)])
+    managers = set()
+    if not bitsets.get((org_id, role_id), 0) & Permission.MANAGE_ROLES:
+        managers = await lock_managers(db, org_id)
+
+    member_ids = list(dict.fromkeys(payload.member_ids))
+    members = (await db.execute(
+        select(Member.id, Member.role_id, Member.status)
+        .where(Member.org_id == org_id, Member.id.in_(member_ids))
+        .with_for_update()
+    )).all()
+
+    outcomes = {member_id: "not_found" for member_id in member_ids}
+    for member in members:
+        outcomes[member.id] = "unchanged" if member.role_id == role_id else "updated"
+    moved = spare_last_managers(
+        managers, [member.id for member in members if outcomes[member.id] == "updated"], outcomes
+    )
+
+    changes = {}
+    for member in members:
+        if outcomes[member.id] != "updated":
+            continue
+        for key, delta in (((org_id, member.role_id, member.status), -1), ((org_id, role_id, member.status), 1)):
+            changes[key] = changes.get(key, 0) + delta
+
+    if moved:
+        await db.execute(
+            update(Member)
+            .where(Member.org_id == org_id, Member.id.in_(moved))
+            .values(role_id=role_id)
+            .execution_options(synchronize_session=False)
+        )
+        await record_member_changes_async(db, changes)
+        await db.commit()
+
+    return {
+        "message": f"{len(moved)} member roles updated",
+        "results": bulk_results(payload.member_ids, outcomes),
+    }
+
+@router.post("/delete-bulk", status_code=status.HTTP_200_OK, dependencies=[query_budget(6)])
+async def delete_members(
+    payload: BulkDeleteMembers,
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)
+):
+    """
+    Remove several members of an organisation at once.
+
+    The members are read and locked with one query, removed with one DELETE
+    and their counters adjusted with one statement, all in one transaction.
+    Members that are the organisation's last managers are not removed and
+    are reported as last_manager. Needs the remove members permission in the
+    organisation.
+
+    Args:
+    payload (BulkDeleteMembers) : Payload containing organisation id and member ids.
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
+
+    Returns:
+    dict : Message and the outcome for every member id.
+    """
+    if len(payload.member_ids) > BULK_MEMBER_LIMIT:
+        raise validation_error("member_ids")
+
+    org_id = payload.organisation_id
+    authorizer.require(org_id, Permission.REMOVE_MEMBERS)
+
+    managers = await lock_managers(db, org_id)
+
+    member_ids = list(dict.fromkeys(payload.member_ids))
+    members = (await db.execute(
+        select(Member.id, Member.role_id, Member.status, User.email)
+        .join(User, User.id == Member.user_id)
+        .where(Member.org_id == org_id, Member.id.in_(member_ids))
+        .with_for_update(of=Member)
+    )).all()
+
+    outcomes = {member_id: "not_found" for member_id in member_ids}
+    for member in members:
+        outcomes[member.id] = "deleted"
+    spare_last_managers(managers, [member.id for member in members], outcomes)
+    members = [member for member in members if outcomes[member.id] == "deleted"]
+
+    changes = {}
+    for member in members:
+        key = (org_id, member.role_id, member.status)
+        changes[key] = changes.get(key, 0) - 1
+
+    if members:
+        await db.execute(
+            delete(Member)
+            .where(Member.org_id == org_id, Member.id.in_([member.id for member in members]))
+            .execution_options(synchronize_session=False)
+        )
+        await record_member_changes_async(db, changes)
+        await db.commit()
+
+        for member in members:
+            invalidate_principal(member.email)
+
+    return {
+        "message": f"{len(members)} members deleted",
+        "results": bulk_results(payload.member_ids, outcomes),
+    }
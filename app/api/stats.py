@@ -1,16 +1,23 @@
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import BigInteger, cast, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.models.user import User
 from app.core.models.role import Role
 from app.core.models.organisation import Organisation
 from app.core.models.member import Member
+from app.core.models.member_stats import MemberStats
 
 
-from app.core.utils.dependencies import get_db
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.query_budget import query_budget
+from app.core.utils.errors import validation_error
 from app.core.utils.middlewares import authenticate_user
+from app.core.utils.permissions import Permission, Authorizer, get_authorizer
+from app.core.utils.pagination import encode_cursor, decode_cursor
+
+STATS_PAGE_SIZE = 100
+STATS_MAX_PAGE_SIZE = 1000
 
 router = APIRouter(
     prefix="/stats",
@@ -18,86 +25,228 @@ router = APIRouter(
     dependencies=[Depends(authenticate_user)]
 )
 
+def organisation_page(columns: dict, keys: list, fields: str, default_fields: list, order_by: str, cursor: str, limit: int):
+    """
+    Build the select of one page of an organisation stats query.
+
+    Only the requested fields and the keys the page is sorted on are
+    selected. The caller adds the tables, filters and grouping.
 
-@router.get("/users-by-role", status_code=status.HTTP_200_OK)
-async def get_users_by_role(db: Session = Depends(get_db)):
+    Args:
+    columns (dict) : Selectable columns keyed by their label.
+    keys (list) : Labels that break ties after the organisation, e.g. the role.
+    fields (str) : Comma separated fields to return, or None for the default fields.
+    default_fields (list) : Fields returned when none are requested.
+    order_by (str) : Sort mode. (id, name, count)
+    cursor (str) : Cursor returned with the previous page.
+    limit (int) : Page size.
+
+    Returns:
+    tuple : Paginated select, the labels of the returned fields and the labels of its keyset.
+    """
+    selected = fields.split(",") if fields else default_fields
+    if any(field not in columns for field in selected):
+        raise validation_error("fields")
+
+    if order_by == "count":
+        if cursor:
+            raise validation_error("cursor")
+        sort_keys = ["id"] + keys
+        ordering = [columns["count"].desc()] + [columns[key] for key in sort_keys]
+    else:
+        sort_keys = (["name", "id"] if order_by == "name" else ["id"]) + keys
+        ordering = [columns[key] for key in sort_keys]
+
+    labels = list(dict.fromkeys(selected + sort_keys))
+    query = select(*(columns[label].label(label) for label in labels)).order_by(*ordering).limit(limit)
+
+    if cursor and order_by != "count":
+        sort_columns = [columns[key] for key in sort_keys]
+        values = decode_cursor(cursor, [column.type.python_type for column in sort_columns])
+        query = query.where(tuple_(*sort_columns) > tuple_(*values))
+
+    return query, selected, sort_keys
+
+def project_page(rows: list, selected: list, sort_keys: list, order_by: str, limit: int):
     """
-    Get the number of users by role.
+    Project the requested fields of a stats page and build its next cursor.
 
     Args:
-    db (Session) : Database session.
+    rows (list) : Rows of the page.
+    selected (list) : Labels of the returned fields.
+    sort_keys (list) : Labels of the keyset of the page.
+    order_by (str) : Sort mode. (id, name, count)
+    limit (int) : Page size.
+
+    Returns:
+    tuple : Projected rows and the cursor of the next page, if any.
+    """
+    next_cursor = None
+    if len(rows) == limit and order_by != "count":
+        next_cursor = encode_cursor([rows[-1]._mapping[key] for key in sort_keys])
+
+    return [tuple(row._mapping[field] for field in selected) for row in rows], next_cursor
+
+
+
+@router.get("/users-by-role", status_code=status.HTTP_200_OK, dependencies=[query_budget(3)])
+async def get_users_by_role(
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)):
+    """
+    Get the number of users by role in the organisations whose stats the user may view.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
 
     Returns:
     dict : Role wise user count.
     """
 
-    results = db.query(Role.name, func.count(User.id)).join(User).group_by(Role.name).all()
+    org_ids = authorizer.require_any(Permission.VIEW_STATS)
+
+    member_count = cast(func.sum(MemberStats.count), BigInteger)
+    query = select(Role.name, member_count)\
+              .join(MemberStats, MemberStats.role_id == Role.id)\
+              .where(MemberStats.org_id.in_(org_ids))\
+              .group_by(Role.name)\
+              .having(member_count > 0)
+
+    results = await db.execute(query)
     return {
         "message": "Role wise user count fetched successfully!",
-        "role_wise_users": results
+        "role_wise_users": [tuple(row) for row in results]
     }
 
-@router.get("/organization-members", status_code=status.HTTP_200_OK)
+@router.get("/organization-members", status_code=status.HTTP_200_OK, dependencies=[query_budget(3)])
 async def get_organization_members(
-    from_time: str = None, 
-    to_time: str = None, 
-    status: str = None, 
-    db: Session = Depends(get_db)):
+    from_time: int = None, 
+    to_time: int = None, 
+    status: int = None, 
+    order_by: str = Query("id", pattern="^(id|name|count)$"),
+    cursor: str = None,
+    limit: int = Query(STATS_PAGE_SIZE, ge=1, le=STATS_MAX_PAGE_SIZE),
+    fields: str = None,
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)):
     """
-    Get the number of members in each organization.
+    Get the number of members in each organization whose stats the user may view.
+
+    Counts come from the member counters unless a time range is given, which
+    needs the member rows themselves. Pages are walked with the returned
+    next_cursor, or the top organisations are returned when ordered by
+    count. Only the requested fields are selected.
 
     Args:
-    from_time (str) : Start time.
-    to_time (str) : End time.
-    status (str) : Membership status.
-    db (Session) : Database session.
+    from_time (int) : Start timestamp.
+    to_time (int) : End timestamp.
+    status (int) : Membership status.
+    order_by (str) : Sort by organisation id, name, or member count (descending).
+    cursor (str) : Cursor returned with the previous page.
+    limit (int) : Page size.
+    fields (str) : Comma separated fields to return. (id, name, count)
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
 
     Returns:
     dict : Organization wise member count.
     """
 
-    query = db.query(Organisation.name, func.count(Member.id)).join(Member).group_by(Organisation.name)
-    
-    if status:
-        query = query.filter(Member.status == status)
-    
-    if from_time and to_time:
-        query = query.filter(Member.created_at.between(from_time, to_time))
-    
-    results = query.all()
+    org_ids = authorizer.require_any(Permission.VIEW_STATS)
+
+    ranged = from_time and to_time
+    member_count = func.count(Member.id) if ranged else cast(func.sum(MemberStats.count), BigInteger)
+    columns = {"id": Organisation.id, "name": Organisation.name, "count": member_count}
+    query, selected, sort_keys = organisation_page(columns, [], fields, ["name", "count"], order_by, cursor, limit)
+
+    if ranged:
+        query = query.select_from(Organisation)\
+                  .join(Member, Member.org_id == Organisation.id)\
+                  .where(Member.created_at.between(from_time, to_time))\
+                  .group_by(Organisation.id, Organisation.name)
+
+        if status is not None:
+            query = query.where(Member.status == status)
+    else:
+        query = query.select_from(Organisation)\
+                  .join(MemberStats, MemberStats.org_id == Organisation.id)\
+                  .group_by(Organisation.id, Organisation.name)\
+                  .having(member_count > 0)
+
+        if status is not None:
+            query = query.where(MemberStats.status == status)
+
+    query = query.where(Organisation.id.in_(org_ids))
+
+    results = (await db.execute(query)).all()
+    rows, next_cursor = project_page(results, selected, sort_keys, order_by, limit)
     return {
         "message": "Organization wise member count fetched successfully!",
-        "organization_wise_members": results
+        "organization_wise_members": rows,
+        "next_cursor": next_cursor
     }
 
-@router.get("/organization-role-wise-users")
-def get_org_role_wise_users(
-    from_time: str = None, 
-    to_time: str = None, 
-    status: str = None, 
-    db: Session = Depends(get_db)):
+@router.get("/organization-role-wise-users", dependencies=[query_budget(3)])
+async def get_org_role_wise_users(
+    from_time: int = None, 
+    to_time: int = None, 
+    status: int = None, 
+    order_by: str = Query("id", pattern="^(id|name|count)$"),
+    cursor: str = None,
+    limit: int = Query(STATS_PAGE_SIZE, ge=1, le=STATS_MAX_PAGE_SIZE),
+    fields: str = None,
+    db: AsyncSession = Depends(get_db_async),
+    authorizer: Authorizer = Depends(get_authorizer)):
     """
-    Get the number of users in each organization by role.
+    Get the number of users by role in each organization whose stats the user may view.
+
+    Counts come from the member counters unless a time range is given, which
+    needs the member rows themselves. Pagination works as for
+    /organization-members, one row per organisation and role.
 
     Args:
-    from_time (str) : Start time.
-    to_time (str) : End time.
-    status (str) : Membership status.
-    db (Session) : Database session.
+    from_time (int) : Start timestamp.
+    to_time (int) : End timestamp.
+    status (int) : Membership status.
+    order_by (str) : Sort by organisation id, name, or member count (descending).
+    cursor (str) : Cursor returned with the previous page.
+    limit (int) : Page size.
+    fields (str) : Comma separated fields to return. (id, name, role, count)
+    db (AsyncSession) : Async database session.
+    authorizer (Authorizer) : Permissions of the authenticated user.
 
     Returns:
     dict : Organization and role wise
     """
-    query = db.query(Organisation.name, Role.name, func.count(User.id))\
-              .join(User)\
-              .join(Role)\
-              .group_by(Organisation.name, Role.name)
-    
-    if status:
-        query = query.filter(Member.status == status)
-
-    if from_time and to_time:
-        query = query.filter(Member.created_at.between(from_time, to_time))
-    
-    results = query.all()
-    return {"org_role_wise_users": results}
+    org_ids = authorizer.require_any(Permission.VIEW_STATS)
+
+    ranged = from_time and to_time
+    member_count = func.count(Member.user_id) if ranged else cast(func.sum(MemberStats.count), BigInteger)
+    columns = {"id": Organisation.id, "name": Organisation.name, "role": Role.name, "count": member_count}
+    query, selected, sort_keys = organisation_page(columns, ["role"], fields, ["name", "role", "count"], order_by, cursor, limit)
+
+    if ranged:
+        query = query.select_from(Member)\
+                  .join(Organisation, Member.org_id == Organisation.id)\
+                  .join(Role, Member.role_id == Role.id)\
+                  .where(Member.created_at.between(from_time, to_time))\
+                  .group_by(Organisation.id, Organisation.name, Role.name)
+
+        if status is not None:
+            query = query.where(Member.status == status)
+    else:
+        query = query.select_from(MemberStats)\
+                  .join(Organisation, MemberStats.org_id == Organisation.id)\
+                  .join(Role, MemberStats.role_id == Role.id)\
+                  .group_by(Organisation.id, Organisation.name, Role.name)\
+                  .having(member_count > 0)
+
+        if status is not None:
+            query = query.where(MemberStats.status == status)
+
+    query = query.where(Organisation.id.in_(org_ids))
+
+    results = (await db.execute(query)).all()
+    rows, next_cursor = project_page(results, selected, sort_keys, order_by, limit)
+    return {"org_role_wise_users": rows, "next_cursor": next_cursor}
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.schema.user import ResetPassword
 
 from app.core.models.user import User
 
-from app.core.utils.auth import get_password_hash
-from app.core.utils.dependencies import get_db
+from app.core.utils.auth import get_password_hash_async, TOKEN_MAX_LIFETIME_SECONDS
+from app.core.utils.admission import hashing_admission
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.query_budget import query_budget
 from app.core.utils.mailers import send_update_pwd_email
-from app.core.utils.middlewares import authenticate_user
+from app.core.utils.middlewares import authenticate_user, invalidate_principal
 from app.core.utils.errors import not_found_error
+from app.core.utils.revocation import revocation_list, revoke_subject
 
 
 router = APIRouter(
@@ -18,30 +22,33 @@ router = APIRouter(
     dependencies=[Depends(authenticate_user)]
 )
 
-@router.post("/reset-password", status_code=status.HTTP_200_OK)
+@router.post("/reset-password", status_code=status.HTTP_200_OK, dependencies=[Depends(hashing_admission.dependency), query_budget(4)])
 async def reset_password(
     background_tasks: BackgroundTasks,
     payload: ResetPassword, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db_async)
 ):
     """
-    Reset password for the user.
+    Reset password for the user, revoking every token issued to them so far.
     
     Args:
     user (ResetPassword) : User details with email and new password.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
     
     Returns:
     dict : Message and data.
     """
  
-    existing_user = db.query(User).filter(User.email == payload.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == payload.email))
     if not existing_user:
         raise not_found_error("User")
 
-    existing_user.password = get_password_hash(payload.password)
-    db.commit()
-    db.refresh(existing_user)
+    existing_user.password = await get_password_hash_async(payload.password)
+    revocation = revoke_subject(db, existing_user.email, TOKEN_MAX_LIFETIME_SECONDS)
+    await db.commit()
+    await db.refresh(existing_user)
+    revocation_list.apply(revocation)
+    invalidate_principal(existing_user.email)
 
     background_tasks.add_task(send_update_pwd_email, existing_user.email)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 
 from app.core.utils.database import Base
@@ -17,6 +17,15 @@ class Invite(Base):
     organization (Organization) : Organization object.
     """
     __tablename__ = "invites"
+    __table_args__ = (
+        Index('ix_invites_email_status', 'email', 'status'),
+        Index(
+            'ix_invites_pending_organisation_id_email', 'organisation_id', 'email',
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        Index('ix_invites_status_expires_at', 'status', 'expires_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, nullable=False)
@@ -26,3 +35,30 @@ class Invite(Base):
     expires_at = Column(DateTime, nullable=False) 
 
     organisation = relationship("Organisation", back_populates="invites")
+
+
+class InviteArchive(Base):
+    """
+    Invite archive model, holding the invites swept from the invites table.
+
+    Attributes:
+    id (int) : Archive entry ID.
+    invite_id (int) : ID the invite had in the invites table.
+    email (str) : Email of the invitee.
+    organisation_id (int) : Organization ID.
+    status (str) : Invite status when it was swept.
+    created_at (datetime) : Created at timestamp.
+    expires_at (datetime) : Expires at timestamp.
+    archived_at (datetime) : Archived at timestamp.
+    """
+    __tablename__ = "invites_archive"
+
+    # Invite ids can be reused once swept, so they are not unique here.
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    invite_id = Column(Integer, nullable=False, index=True)
+    email = Column(String, nullable=False)
+    organisation_id = Column(Integer, nullable=True)
+    status = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, JSON, BigInteger
+from sqlalchemy import Column, Integer, ForeignKey, JSON, BigInteger, Index
 from sqlalchemy.orm import relationship
 
 from app.core.utils.database import Base
@@ -18,6 +18,13 @@ class Member(Base):
     updated_at (int) : Updated timestamp of member.
     """
     __tablename__ = 'member'
+    __table_args__ = (
+        Index('ix_member_user_id_org_id', 'user_id', 'org_id'),
+        Index('ix_member_org_id_role_id', 'org_id', 'role_id'),
+        Index('ix_member_role_id', 'role_id'),
+        Index('ix_member_status_created_at', 'status', 'created_at'),
+        Index('ix_member_org_id_id', 'org_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     org_id = Column(Integer, ForeignKey('organisation.id', ondelete='CASCADE'), nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, BigInteger
+
+from app.core.utils.database import Base
+
+class MemberStats(Base):
+    """
+    Model for member_stats table, the incrementally maintained member counts.
+
+    Attributes:
+    org_id (int) : Unique identifier for organisation.
+    role_id (int) : Unique identifier for role.
+    status (int) : Status of member.
+    count (int) : Number of members with this organisation, role and status.
+    """
+    __tablename__ = 'member_stats'
+
+    org_id = Column(Integer, ForeignKey('organisation.id', ondelete='CASCADE'), primary_key=True)
+    role_id = Column(Integer, ForeignKey('role.id', ondelete='CASCADE'), primary_key=True)
+    status = Column(Integer, primary_key=True)
+    count = Column(BigInteger, default=0, nullable=False)
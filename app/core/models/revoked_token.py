@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, String, Index
+
+from app.core.utils.database import Base
+
+class RevokedToken(Base):
+    """
+    Model for revoked_token table, the revocation store of issued tokens.
+
+    A row either revokes the single token with the given jti, or every token
+    of a subject issued at or before revoked_at. Rows can be deleted once
+    expires_at has passed, since the tokens they revoke have expired too.
+
+    Attributes:
+    id (int) : Unique identifier for revocation, increasing in insert order.
+    jti (str) : Unique identifier of the revoked token.
+    subject (str) : Email address of the user whose tokens are all revoked.
+    revoked_at (float) : Revocation timestamp.
+    expires_at (int) : Timestamp after which the revoked tokens have expired.
+    """
+    __tablename__ = 'revoked_token'
+    __table_args__ = (
+        Index('ix_revoked_token_expires_at', 'expires_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String, nullable=True)
+    subject = Column(String, nullable=True)
+    revoked_at = Column(Float, nullable=False)
+    expires_at = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 
 from app.core.utils.database import Base
@@ -12,12 +12,17 @@ class Role(Base):
     name (str) : Name of role.
     description (str) : Description of role.
     org_id (int) : Unique identifier for organisation.
+    permissions (int) : Bitset of the permissions granted by the role.
     """
     __tablename__ = 'role'
+    __table_args__ = (
+        Index('ix_role_org_id_name', 'org_id', 'name'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     org_id = Column(Integer, ForeignKey('organisation.id', ondelete='CASCADE'), nullable=False)
+    permissions = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
 
     memberships = relationship('Member', back_populates='role')
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, Field
 
 class InviteMember(BaseModel):
@@ -11,6 +13,17 @@ class InviteMember(BaseModel):
     organisation_id: int = Field(...,example=1)
     recipient_mail: str = Field(...,example="xyz@gmail.com")
 
+class BulkInviteMembers(BaseModel):
+    """
+    Schema for inviting several members to an organisation at once
+    
+    Attributes:
+    organisation_id (int): Organisation ID.
+    recipient_mails (List[str]): Emails of the recipients.
+    """
+    organisation_id: int = Field(...,example=1)
+    recipient_mails: List[str] = Field(...,example=["xyz@gmail.com", "abc@gmail.com"])
+
 class UpdateRole(BaseModel):
     """
     Schema for updating a member's role
@@ -20,4 +33,28 @@ class UpdateRole(BaseModel):
     role_name (str): Name of the role.
     """
     member_id: int = Field(...,example=1)
-    role_name: str = Field(...,example="admin")
\ No newline at end of file
+    role_name: str = Field(...,example="admin")
+
+class BulkUpdateRole(BaseModel):
+    """
+    Schema for moving several members of an organisation to a role at once
+    
+    Attributes:
+    organisation_id (int): Organisation ID.
+    member_ids (List[int]): Member IDs.
+    role_name (str): Name of the role.
+    """
+    organisation_id: int = Field(...,example=1)
+    member_ids: List[int] = Field(...,example=[1, 2])
+    role_name: str = Field(...,example="admin")
+
+class BulkDeleteMembers(BaseModel):
+    """
+    Schema for removing several members of an organisation at once
+    
+    Attributes:
+    organisation_id (int): Organisation ID.
+    member_ids (List[int]): Member IDs.
+    """
+    organisation_id: int = Field(...,example=1)
+    member_ids: List[int] = Field(...,example=[1, 2])
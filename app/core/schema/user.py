@@ -38,3 +38,13 @@ class ResetPassword(BaseModel):
     email: EmailStr = Field(..., example="xyz@gmail.com")
     password: str = Field(..., example="password")
 
+
+class RefreshToken(BaseModel):
+    """
+    Refresh Token Schema
+
+    Attributes:
+    refresh_token (str) : Refresh token issued at sign in.
+    """
+
+    refresh_token: str = Field(..., example="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...")
@@ -0,0 +1,123 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.utils.errors import too_many_requests_error, service_unavailable_error
+from app.core.utils.hashing import HASH_WORKERS
+from app.core.utils.metrics import register_collector
+
+load_dotenv()
+
+ADMISSION_HASH_CONCURRENCY = int(getenv("ADMISSION_HASH_CONCURRENCY", HASH_WORKERS))
+ADMISSION_HASH_QUEUE = int(getenv("ADMISSION_HASH_QUEUE", 4 * ADMISSION_HASH_CONCURRENCY))
+ADMISSION_QUEUE_TIMEOUT = float(getenv("ADMISSION_QUEUE_TIMEOUT", 2))
+ADMISSION_RETRY_AFTER = int(getenv("ADMISSION_RETRY_AFTER", 1))
+
+
+class AdmissionController:
+    """
+    Concurrency cap with a bounded queue in front of expensive endpoints.
+
+    Up to concurrency requests run at once and up to queue_size more wait
+    for a slot. A request arriving when the queue is full is rejected at once
+    with 429, and one that waited longer than queue_timeout is rejected with
+    503; both carry a Retry-After header. Requests are never queued without
+    bound, so a burst on these endpoints cannot hold up the others.
+
+    Attributes:
+    concurrency (int) : Maximum number of requests running at once.
+    queue_size (int) : Maximum number of requests waiting for a slot.
+    queue_timeout (float) : Seconds a request may wait for a slot.
+    retry_after (int) : Seconds sent in the Retry-After header of rejections.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int, queue_timeout: float, retry_after: int):
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = None
+        self._loop = None
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self.active = 0
+            self.waiting = 0
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Wait for a slot, or reject the request if none frees up in time.
+        """
+        self._bind()
+
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                self.shed_queue_full += 1
+                raise too_many_requests_error(self.retry_after)
+
+            self.waiting += 1
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed_timeout += 1
+                raise service_unavailable_error(self.retry_after)
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    async def dependency(self):
+        """
+        Route dependency holding a slot while the endpoint runs.
+        """
+        async with self.admit():
+            yield
+
+    def stats(self):
+        """
+        Get the admission counters.
+
+        Returns:
+        dict : Running and waiting requests, and admitted, queued and shed counts.
+        """
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+hashing_admission = AdmissionController(
+    ADMISSION_HASH_CONCURRENCY,
+    ADMISSION_HASH_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER,
+)
+register_collector("hashing_admission", hashing_admission.stats)
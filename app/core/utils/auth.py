@@ -1,7 +1,10 @@
-from passlib.context import CryptContext
+from time import time
+from uuid import uuid4
+
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from dotenv import load_dotenv
 from os import getenv
@@ -11,42 +14,47 @@ from app.core.models.organisation import Organisation
 from app.core.models.role import Role
 from app.core.models.member import Member
 
-from app.core.utils.dependencies import save_and_refresh
+from app.core.utils.database import dialect_insert
 from app.core.utils.errors import conflict_error, credential_error
+from app.core.utils.roles import role_directory
+from app.core.utils.permissions import DEFAULT_ROLE_PERMISSIONS
+from app.core.utils.stats import record_member_change_async
+from app.core.utils.hashing import hash_password, check_password, check_and_update_password, hashing_executor
+from app.core.utils.rehash import rehash_queue
 
 load_dotenv()
 
 SECRET_KEY = getenv("SECRET_KEY")
 ALGORITHM = getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+REFRESH_TOKEN_EXPIRE_DAYS = int(getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+TOKEN_MAX_LIFETIME_SECONDS = max(ACCESS_TOKEN_EXPIRE_MINUTES * 60, REFRESH_TOKEN_EXPIRE_DAYS * 86400)
 
 
-def get_password_hash(password):
+async def get_password_hash_async(password):
     """
-    Get the hashed password.
-    
+    Get the hashed password without blocking the event loop.
+
     Args:
     password (str) : Plain password.
-    
+
     Returns:
     str : Hashed password.
     """
-    return pwd_context.hash(password)
+    return await hashing_executor.run(hash_password, password)
 
-def verify_password(plain_password, hashed_password):
+async def verify_password_async(plain_password, hashed_password):
     """
-    Verify the password with the hashed password.
-    
+    Verify the password with the hashed password without blocking the event loop.
+
     Args:
     plain_password (str) : Plain password.
     hashed_password (str) : Hashed password.
-    
+
     Returns:
     bool : True if password matches, False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await hashing_executor.run(check_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict):
@@ -61,7 +69,7 @@ def create_access_token(data: dict):
     """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time(), "jti": uuid4().hex, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -95,74 +103,88 @@ def create_refresh_token(data: dict):
     """
 
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=7)
-    to_encode.update({"exp": expire})
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "iat": time(), "jti": uuid4().hex, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-
-def check_user_exists(db: Session, email: str):
+def decode_refresh_token(token: str):
     """
-    Check if user exists.
+    Decode the refresh token.
 
     Args:
-    db (Session) : Database session.
-    email (str) : Email address of user.
+    token (str) : Encoded token.
+
+    Returns:
+    dict : Decoded token, or None if it is invalid or not a refresh token.
     """
 
-    user = db.query(User).filter(User.email == email).first()
-    if user is not None:
-        raise conflict_error("User")
+    payload = decode_access_token(token)
+    if not payload or payload.get("type") != "refresh":
+        return None
+    return payload
+
 
-def create_user(db: Session, email: str, password: str):
+async def sign_up_user_async(db: AsyncSession, email: str, password: str, organization_name: str):
     """
-    Create user.
+    Create a user with their organisation, roles and owner membership in one transaction.
+
+    The user row is inserted with ON CONFLICT DO NOTHING, so a duplicate email
+    is detected by the insert itself. Ids are assigned by flushing and the
+    whole unit of work is committed once.
 
     Args:
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
     email (str) : Email address of user.
     password (str) : Password of user.
+    organization_name (str) : Name of organisation.
 
     Returns:
-    int : User id.
+    tuple : User id and organisation id.
     """
 
-    hashed_password = get_password_hash(password)
-    
-    user = User(email=email, password=hashed_password)
-    save_and_refresh(db, user)
+    hashed_password = await get_password_hash_async(password)
 
-    return user.id
-    
-def create_user_resources(db: Session, user_id: int, organization_name: str):
-    """
-    Create user resources.
+    try:
+        user_id = await db.scalar(
+            dialect_insert(db.bind.dialect.name, User)
+            .values(email=email, password=hashed_password)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id)
+        )
+        if user_id is None:
+            raise conflict_error("User")
 
-    Args:
-    db (Session) : Database session.
-    user_id (int) : User id.
-    """
+        organization = Organisation(name=organization_name, status=1)
+        db.add(organization)
+        await db.flush()
 
-    organization = Organisation(name=organization_name, status=1)
-    save_and_refresh(db, organization)
+        owner_role = Role(name="owner", org_id=organization.id, permissions=DEFAULT_ROLE_PERMISSIONS["owner"])
+        member_role = Role(name="member", org_id=organization.id, permissions=DEFAULT_ROLE_PERMISSIONS["member"])
+        db.add_all([owner_role, member_role])
+        await db.flush()
 
-    owner_role = Role(name="owner", org_id=organization.id)
-    save_and_refresh(db, owner_role)
+        db.add(Member(org_id=organization.id, user_id=user_id, role_id=owner_role.id, status=1))
+        await record_member_change_async(db, organization.id, owner_role.id, 1, 1)
+        await db.commit()
 
-    member_role = Role(name="member", org_id=organization.id)
-    save_and_refresh(db, member_role)
+    except Exception as e:
+        await db.rollback()
+        raise e
 
-    member = Member(org_id=organization.id, user_id=user_id, role_id=owner_role.id, status=1)
-    save_and_refresh(db, member)
+    role_directory.prime(organization.id, [owner_role, member_role])
 
-    return organization.id
+    return user_id, organization.id
 
-def verify_user(db: Session, email: str, password: str):
+async def verify_user_async(db: AsyncSession, email: str, password: str):
     """
-    Verify the user.
+    Verify the user, checking the password in the hashing executor.
+
+    If the stored hash was made with another bcrypt cost than BCRYPT_ROUNDS,
+    the password is rehashed and the new hash is queued for a batched write.
 
     Args:
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
     email (str) : Email address of user.
     password (str) : Password of user.
 
@@ -170,9 +192,12 @@ def verify_user(db: Session, email: str, password: str):
     User : User object.
     """
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         raise credential_error()
-    if not verify_password(password, user.password):
+    verified, new_hash = await hashing_executor.run(check_and_update_password, password, user.password)
+    if not verified:
         raise credential_error()
+    if new_hash:
+        rehash_queue.enqueue(user.id, user.password, new_hash)
     return user
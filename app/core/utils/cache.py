@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries also expire after a fixed TTL.
+
+    The cache is local to a worker process, so invalidation only affects the
+    worker it is called on; the TTL bounds how long other workers may serve a
+    stale entry.
+
+    Attributes:
+    maxsize (int) : Maximum number of entries kept before evicting the least recently used.
+    ttl (float) : Seconds an entry stays valid after it is stored.
+    hits (int) : Number of lookups served from the cache.
+    misses (int) : Number of lookups that found no valid entry.
+    evictions (int) : Number of entries dropped because the cache was full.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Args:
+        key : Cache key.
+
+        Returns:
+        object : Cached value, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at < monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+        key : Cache key.
+        value : Value to be cached.
+        """
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Drop a single entry from the cache.
+
+        Args:
+        key : Cache key.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every entry from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+        dict : Size, capacity, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -1,21 +1,238 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from app.core.utils.mailers.py import send_email
-from datetime import datetime, timedelta
+import logging
+import asyncio
+from datetime import datetime, timezone
+
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import text
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.utils.database import engine
+from app.core.utils.mailers import send_email, send_emails
+from app.core.utils.metrics import register_collector
+
+load_dotenv()
+
+SCHEDULER_LOCK_KEY = int(getenv("SCHEDULER_LOCK_KEY", 7231))
+SCHEDULER_POLL_SECONDS = float(getenv("SCHEDULER_POLL_SECONDS", 10))
+SCHEDULER_MISFIRE_GRACE_SECONDS = int(getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", 3600))
+
+logger = logging.getLogger(__name__)
+
+
+class JobScheduler:
+    """
+    Application-lifetime scheduler for delayed jobs.
+
+    Jobs are persisted in the database job store, so they survive restarts
+    and can be added from any worker. Only the worker holding the PostgreSQL
+    advisory lock runs them; the others keep their scheduler paused and retry
+    the lock every poll interval, so a new leader takes over if the current
+    one dies. Jobs in the "local" store are kept in memory, so periodic jobs
+    registered by every worker at startup still only run on the leader.
+
+    Attributes:
+    scheduler (AsyncIOScheduler) : Underlying APScheduler scheduler.
+    is_leader (bool) : Whether this worker runs the persisted jobs.
+    """
+
+    def __init__(self, db_engine):
+        self.engine = db_engine
+        self.jobstore = SQLAlchemyJobStore(engine=db_engine)
+        self.scheduler = AsyncIOScheduler(
+            jobstores={"default": self.jobstore, "local": MemoryJobStore()},
+            job_defaults={"misfire_grace_time": SCHEDULER_MISFIRE_GRACE_SECONDS},
+            timezone=timezone.utc,
+        )
+        self.scheduler.add_listener(self._on_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+        self.is_leader = False
+        self._lock_connection = None
+        self._poll_task = None
+
+        self.executed = 0
+        self.failed = 0
+        self.missed = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+
+    def _on_job_event(self, event):
+        if event.code == EVENT_JOB_MISSED:
+            self.missed += 1
+            return
+
+        if event.code == EVENT_JOB_ERROR:
+            self.failed += 1
+        else:
+            self.executed += 1
+
+        lag = (datetime.now(timezone.utc) - event.scheduled_run_time).total_seconds()
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+
+    def _acquire_leadership(self):
+        if self.engine.dialect.name != "postgresql":
+            return True
+
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+
+        if not acquired:
+            connection.close()
+            return False
+
+        self._lock_connection = connection
+        return True
+
+    def _leadership_alive(self):
+        if self._lock_connection is None:
+            return True
+
+        try:
+            self._lock_connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            self._lock_connection.invalidate()
+            self._lock_connection = None
+            return False
+
+    def _release_leadership(self):
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+                )
+            finally:
+                self._lock_connection.close()
+                self._lock_connection = None
+
+    async def _elect(self):
+        if self.is_leader:
+            if await asyncio.to_thread(self._leadership_alive):
+                self.scheduler.wakeup()
+                return
+            self.is_leader = False
+            self.scheduler.pause()
+
+        if await asyncio.to_thread(self._acquire_leadership):
+            self.is_leader = True
+            self.scheduler.resume()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(SCHEDULER_POLL_SECONDS)
+            try:
+                await self._elect()
+            except Exception:
+                logger.exception("Scheduler leader election failed")
+
+    async def start(self):
+        """
+        Start the scheduler paused and run the leader election.
+        """
+        self.scheduler.start(paused=True)
+        await self._elect()
+        self._poll_task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def shutdown(self):
+        """
+        Stop the scheduler and give up the leadership.
+        """
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+        await asyncio.to_thread(self._release_leadership)
+        self.is_leader = False
+
+    def add_job(self, func, trigger, **options):
+        """
+        Add a job to the scheduler.
+
+        Args:
+        func (callable) : Module level function to run.
+        trigger (str) : APScheduler trigger name.
+        options : Trigger and job options passed to APScheduler.
+
+        Returns:
+        Job : Scheduled job.
+        """
+        return self.scheduler.add_job(func, trigger, **options)
+
+    def stats(self):
+        """
+        Get the scheduler counters.
+
+        Queue depth and lag are read from the job store, so they cover the
+        jobs added by every worker.
+
+        Returns:
+        dict : Leadership, queue depth, due lag and executed job counters.
+        """
+        depth, next_run_time = 0, None
+        if self.scheduler.running:
+            with self.engine.connect() as connection:
+                depth, next_run_time = connection.execute(
+                    text(f"SELECT COUNT(*), MIN(next_run_time) FROM {self.jobstore.jobs_t.name}")
+                ).one()
+
+        now = datetime.now(timezone.utc).timestamp()
+        return {
+            "leader": int(self.is_leader),
+            "queue_depth": depth,
+            "due_lag_seconds": max(0.0, now - next_run_time) if next_run_time else 0.0,
+            "executed": self.executed,
+            "failed": self.failed,
+            "missed": self.missed,
+            "run_lag_seconds_last": self.lag_last,
+            "run_lag_seconds_max": self.lag_max,
+        }
+
+
+job_scheduler = JobScheduler(engine)
+register_collector("scheduler", job_scheduler.stats)
+
 
 def schedule_email(recipient_email, subject, body, schedule_time):
     """
     Schedule an email to be sent at a later time.
-    
+
     Args:
     recipient_email (str) : Recipient email.
     subject (str) : Subject of email.
     body (str) : Email body.
-    schedule_time (datetime) : Time to send the email.
+    schedule_time (datetime) : Time to send the email, in UTC.
+    """
+    job_scheduler.add_job(
+        send_email,
+        'date',
+        run_date=schedule_time,
+        args=[recipient_email, subject, body],
+    )
+
+def schedule_emails(messages, schedule_time):
+    """
+    Schedule a batch of emails to be sent together at a later time.
+
+    Args:
+    messages (list) : (recipient_email, subject, body) tuples.
+    schedule_time (datetime) : Time to send the emails, in UTC.
     """
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        send_email_invite.s(recipient_email, subject, body),
+    job_scheduler.add_job(
+        send_emails,
         'date',
-        run_date=schedule_time
+        run_date=schedule_time,
+        args=[[list(message) for message in messages]],
     )
-    scheduler.start()
@@ -1,18 +1,244 @@
-from sqlalchemy import create_engine
+from time import perf_counter
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 
 from dotenv import load_dotenv
 from os import getenv
 
+from app.core.utils.metrics import register_collector, record_query
+from app.core.utils.query_budget import count_query
+
 load_dotenv()
 
+DB_ECHO = getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_uri(database_uri: str):
+    """
+    Derive the async driver URI from a sync database URI.
+
+    Args:
+    database_uri (str) : Sync database URI.
+
+    Returns:
+    str : The same URI using the matching async driver.
+    """
+    scheme, separator, rest = database_uri.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+class PoolStats:
+    """
+    Counters of a connection pool.
+
+    Attributes:
+    engine (Engine) : Engine whose pool is observed.
+    checkouts (int) : Number of connections handed out.
+    connects (int) : Number of new DBAPI connections opened.
+    invalidations (int) : Number of connections invalidated.
+    timeouts (int) : Number of checkouts that gave up after pool_timeout.
+    wait_total (float) : Seconds spent waiting for a connection.
+    wait_max (float) : Longest wait for a connection, in seconds.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float):
+        """
+        Record the time a checkout waited for a connection.
+
+        Args:
+        seconds (float) : Wait time in seconds.
+        """
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def collect(self):
+        """
+        Get the pool counters together with the live pool state.
+
+        Returns:
+        dict : Pool counters.
+        """
+        pool = self.engine.pool
+        live = {}
+        if isinstance(pool, QueuePool):
+            live = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+            }
+
+        return {
+            **live,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_total,
+            "wait_seconds_max": self.wait_max,
+        }
+
+
+class TimedPoolMixin:
+    """
+    Pool mixin recording how long each checkout waited for a connection.
+    """
+    stats = None
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.timeouts += 1
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def create_db_engine(database_uri: str, is_async: bool = False):
+    """
+    Create an engine configured from the DB_* environment variables.
+
+    Pool settings and the statement timeout only apply to server databases;
+    SQLite keeps SQLAlchemy's default pool. Every statement is counted and
+    timed against the request it runs for.
+
+    Args:
+    database_uri (str) : Database URI.
+    is_async (bool) : Create an AsyncEngine instead of a sync Engine.
+
+    Returns:
+    Engine : Sync or async engine whose pool counters are in engine.pool.stats.
+    """
+    url = make_url(database_uri)
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+
+    if DB_STATEMENT_TIMEOUT_MS and url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    if is_async:
+        db_engine = create_async_engine(url, **options)
+        sync_engine = db_engine.sync_engine
+    else:
+        db_engine = create_engine(url, **options)
+        sync_engine = db_engine
+
+    stats = PoolStats(sync_engine)
+    sync_engine.pool.stats = stats
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def on_before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        context.query_started = perf_counter()
+        count_query()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def on_after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        record_query(perf_counter() - context.query_started)
+
+    return db_engine
+
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def dialect_insert(dialect_name: str, table):
+    """
+    Build an INSERT that supports ON CONFLICT clauses on the given dialect.
+
+    Args:
+    dialect_name (str) : Name of the database dialect.
+    table : Model or table to insert into.
+
+    Returns:
+    Insert : Dialect specific insert statement.
+    """
+    return DIALECT_INSERTS[dialect_name](table)
+
 DATABASE_URI = getenv("DATABASE_URI")
 
 if DATABASE_URI is None:
     raise ValueError("DATABASE_URI environment variable is not set")
 
-engine = create_engine(DATABASE_URI, echo=True)
+ASYNC_DATABASE_URI = getenv("ASYNC_DATABASE_URI") or get_async_database_uri(DATABASE_URI)
+
+engine = create_db_engine(DATABASE_URI)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+async_engine = create_db_engine(ASYNC_DATABASE_URI, is_async=True)
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+register_collector("db_pool", engine.pool.stats.collect)
+register_collector("db_async_pool", async_engine.sync_engine.pool.stats.collect)
+
+Base = declarative_base()
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.utils.database import SessionLocal
+from app.core.utils.database import SessionLocal, AsyncSessionLocal
 
 def get_db():
     """
@@ -13,6 +14,14 @@ def get_db():
     finally:
         db.close()
 
+async def get_db_async():
+    """
+    Get the async database session.
+    """
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def save_and_refresh(db: Session, obj):
     """
     Add an object to the database, commit the transaction, and refresh the object.
@@ -33,4 +42,26 @@ def save_and_refresh(db: Session, obj):
         db.rollback()
         raise e
     
-    return obj
\ No newline at end of file
+    return obj
+
+async def save_and_refresh_async(db: AsyncSession, obj):
+    """
+    Add an object to the database, commit the transaction, and refresh the object.
+
+    Args:
+        db (AsyncSession): The SQLAlchemy async session.
+        obj: The SQLAlchemy model object to be added to the database.
+
+    Returns:
+        The refreshed object.
+    """
+    try:
+        db.add(obj)
+        await db.commit()
+        await db.refresh(obj)
+
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+    return obj
@@ -2,9 +2,9 @@ from fastapi import HTTPException, status
 
 
 class APIError(HTTPException):
-    def __init__(self, status_code: int, error_type: str, detail: str):
+    def __init__(self, status_code: int, error_type: str, detail: str, headers: dict = None):
         error_detail = {"type": error_type, "message": detail}
-        super().__init__(status_code=status_code, detail=[error_detail])
+        super().__init__(status_code=status_code, detail=[error_detail], headers=headers)
 
 
 def handle_exception(
@@ -40,6 +40,14 @@ def validation_error(field: str):
     )
 
 
+def last_manager_error():
+    return APIError(
+        status_code=status.HTTP_409_CONFLICT,
+        error_type="last_manager_error",
+        detail="The organisation must keep a member who can manage roles!",
+    )
+
+
 def credential_error():
     return APIError(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,4 +61,22 @@ def unauthorized_error():
         status_code=status.HTTP_401_UNAUTHORIZED,
         error_type="unauthorized_error",
         detail="You are not authorized!",
-    )
\ No newline at end of file
+    )
+
+
+def too_many_requests_error(retry_after: int):
+    return APIError(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        error_type="too_many_requests_error",
+        detail="Too many requests, please retry later!",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def service_unavailable_error(retry_after: int):
+    return APIError(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        error_type="service_unavailable_error",
+        detail="Service is busy, please retry later!",
+        headers={"Retry-After": str(retry_after)},
+    )
@@ -0,0 +1,244 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from time import perf_counter
+
+from passlib.context import CryptContext
+
+from dotenv import load_dotenv
+from os import getenv, cpu_count
+
+from app.core.utils.metrics import register_collector, record_time
+
+load_dotenv()
+
+HASH_EXECUTOR = getenv("HASH_EXECUTOR", "process")
+HASH_WORKERS = int(getenv("HASH_WORKERS", cpu_count() or 1))
+BCRYPT_ROUNDS = int(getenv("BCRYPT_ROUNDS", 12))
+
+
+
+def crypt_context(rounds: int):
+    """
+    Build a password context hashing at the given bcrypt cost.
+
+    Hashes with any other cost are reported as needing an update, so they are
+    rehashed at this cost on the next successful login.
+
+    Args:
+    rounds (int) : bcrypt cost.
+
+    Returns:
+    CryptContext : Password context.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = crypt_context(BCRYPT_ROUNDS)
+
+
+def hash_password(password: str):
+    """
+    Hash a password. Runs inside the hashing executor.
+
+    Args:
+    password (str) : Plain password.
+
+    Returns:
+    str : Hashed password.
+    """
+    return pwd_context.hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str):
+    """
+    Verify a password against its hash. Runs inside the hashing executor.
+
+    Args:
+    plain_password (str) : Plain password.
+    hashed_password (str) : Hashed password.
+
+    Returns:
+    bool : True if password matches, False otherwise.
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def check_and_update_password(plain_password: str, hashed_password: str):
+    """
+    Verify a password against its hash, and rehash it if its cost differs from
+    BCRYPT_ROUNDS. Runs inside the hashing executor.
+
+    Args:
+    plain_password (str) : Plain password.
+    hashed_password (str) : Hashed password.
+
+    Returns:
+    tuple : Whether the password matches, and the new hash or None.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def calibrate_rounds(target_seconds: float, samples: int = 3, min_rounds: int = 4, max_rounds: int = 16):
+    """
+    Find the highest bcrypt cost whose hash time on this host fits a target.
+
+    Each cost doubles the hash time, so costs are timed in increasing order
+    until one is over the target.
+
+    Args:
+    target_seconds (float) : Target hash time.
+    samples (int) : Hashes timed per cost; the median is used.
+    min_rounds (int) : Lowest cost to consider.
+    max_rounds (int) : Highest cost to consider.
+
+    Returns:
+    tuple : Chosen cost, and the median hash time of every cost timed.
+    """
+    crypt_context(min_rounds).hash("calibration-password")
+
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        context = crypt_context(rounds)
+        durations = []
+        for _ in range(max(1, samples)):
+            started = perf_counter()
+            context.hash("calibration-password")
+            durations.append(perf_counter() - started)
+
+        timings[rounds] = sorted(durations)[len(durations) // 2]
+        if timings[rounds] > target_seconds:
+            break
+        chosen = rounds
+
+    return chosen, timings
+
+
+class HashingExecutor:
+    """
+    Executor that keeps bcrypt work off the event loop.
+
+    A process pool is used by default so hashing scales with cores; if it
+    cannot be created (or breaks) a thread pool is used instead, which still
+    frees the event loop because bcrypt releases the GIL.
+
+    Attributes:
+    kind (str) : Requested executor kind. (process, thread)
+    max_workers (int) : Number of workers in the pool.
+    """
+
+    def __init__(self, kind: str, max_workers: int):
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._executor = None
+        self._active_kind = None
+        self._lock = Lock()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    try:
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                        self._active_kind = "process"
+                    except (OSError, NotImplementedError, ImportError):
+                        self._executor = None
+
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="hashing",
+                    )
+                    self._active_kind = "thread"
+
+            return self._executor
+
+    def _fall_back_to_threads(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="hashing",
+                )
+                self._active_kind = "thread"
+                broken.shutdown(wait=False)
+
+    async def run(self, fn, *args):
+        """
+        Run a hashing function in the pool and wait for the result.
+
+        Args:
+        fn (callable) : Module level function to run.
+        args : Arguments of the function.
+
+        Returns:
+        object : Result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        self.in_flight += 1
+        started = perf_counter()
+        try:
+            try:
+                result = await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                self._fall_back_to_threads(executor)
+                result = await loop.run_in_executor(self._get_executor(), fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        else:
+            elapsed = perf_counter() - started
+            self.completed += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            return result
+        finally:
+            record_time("hashing", perf_counter() - started)
+            self.in_flight -= 1
+
+    def stats(self):
+        """
+        Get the executor counters.
+
+        Returns:
+        dict : Pool type, size, in-flight and queued calls, and latency totals.
+        """
+        return {
+            "process_pool": int((self._active_kind or self.kind) == "process"),
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.max_workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "latency_seconds_total": self.latency_total,
+            "latency_seconds_max": self.latency_max,
+        }
+
+    def shutdown(self):
+        """
+        Shut the pool down.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hashing_executor = HashingExecutor(HASH_EXECUTOR, HASH_WORKERS)
+register_collector("hashing", hashing_executor.stats)
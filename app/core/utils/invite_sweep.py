@@ -0,0 +1,175 @@
+import logging
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import select, insert, delete, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.models.invites import Invite, InviteArchive
+
+from app.core.utils.database import AsyncSessionLocal
+from app.core.utils.metrics import register_collector
+
+load_dotenv()
+
+INVITE_SWEEP_SECONDS = int(getenv("INVITE_SWEEP_SECONDS", 600))
+INVITE_SWEEP_BATCH_SIZE = int(getenv("INVITE_SWEEP_BATCH_SIZE", 500))
+INVITE_SWEEP_TIME_BUDGET = float(getenv("INVITE_SWEEP_TIME_BUDGET", 5))
+INVITE_SWEEP_GRACE_DAYS = int(getenv("INVITE_SWEEP_GRACE_DAYS", 1))
+INVITE_SWEEP_ARCHIVE = getenv("INVITE_SWEEP_ARCHIVE", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+
+class InviteSweeper:
+    """
+    Removes the invites that can no longer be used.
+
+    Pending invites expired for longer than the grace period, and accepted
+    invites, are deleted, or moved to invites_archive when archiving is
+    enabled. Each batch is selected through the (status, expires_at) index
+    and removed in its own short transaction, so rows are only locked for
+    one batch at a time; on PostgreSQL rows still locked by another sweep
+    are skipped. A run stops once its time budget is spent and
+    carries on at the next run.
+
+    Attributes:
+    batch_size (int) : Invites removed per transaction.
+    time_budget (float) : Seconds a run may spend sweeping.
+    grace (timedelta) : Time an expired invite is kept after expiring.
+    archive (bool) : Copy the swept invites to invites_archive.
+    """
+
+    def __init__(self, batch_size: int, time_budget: float, grace: timedelta, archive: bool):
+        self.batch_size = max(1, batch_size)
+        self.time_budget = time_budget
+        self.grace = grace
+        self.archive = archive
+
+        self.runs = 0
+        self.failures = 0
+        self.swept_expired = 0
+        self.swept_accepted = 0
+        self.last_swept = 0
+        self.last_duration_seconds = 0.0
+        self.budget_exhausted = 0
+
+    def _criteria(self, now: datetime):
+        return {
+            "expired": (Invite.status == "pending", Invite.expires_at < now - self.grace),
+            "accepted": (Invite.status == "accepted",),
+        }
+
+    async def sweep_batch(self, db: AsyncSession, criteria: tuple, now: datetime):
+        """
+        Remove one batch of invites matching the criteria and commit.
+
+        Args:
+        db (AsyncSession) : Async database session.
+        criteria (tuple) : Conditions the invites must match.
+        now (datetime) : Time of the run.
+
+        Returns:
+        int : Number of invites removed.
+        """
+        invite_ids = list(await db.scalars(
+            select(Invite.id)
+            .where(*criteria)
+            .order_by(Invite.expires_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ))
+        if not invite_ids:
+            return 0
+
+        if self.archive:
+            await db.execute(
+                insert(InviteArchive).from_select(
+                    ["invite_id", "email", "organisation_id", "status", "created_at", "expires_at", "archived_at"],
+                    select(
+                        Invite.id, Invite.email, Invite.organisation_id, Invite.status,
+                        Invite.created_at, Invite.expires_at, literal(now, InviteArchive.archived_at.type),
+                    ).where(Invite.id.in_(invite_ids)),
+                )
+            )
+        await db.execute(delete(Invite).where(Invite.id.in_(invite_ids)))
+        await db.commit()
+        return len(invite_ids)
+
+    async def run(self):
+        """
+        Sweep invites in batches until none are left or the time budget is spent.
+        """
+        started = perf_counter()
+        now = datetime.utcnow()
+        swept = 0
+
+        try:
+            async with AsyncSessionLocal() as db:
+                for reason, criteria in self._criteria(now).items():
+                    while True:
+                        if perf_counter() - started >= self.time_budget:
+                            self.budget_exhausted += 1
+                            return
+
+                        count = await self.sweep_batch(db, criteria, now)
+                        swept += count
+                        if reason == "expired":
+                            self.swept_expired += count
+                        else:
+                            self.swept_accepted += count
+                        if count < self.batch_size:
+                            break
+        except Exception:
+            self.failures += 1
+            logger.exception("Invite sweep failed")
+        finally:
+            self.runs += 1
+            self.last_swept = swept
+            self.last_duration_seconds = perf_counter() - started
+
+    def stats(self):
+        """
+        Get the sweeper counters.
+
+        Returns:
+        dict : Run counts, invites swept by reason and the size and duration of the last run.
+        """
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "budget_exhausted": self.budget_exhausted,
+            "swept_expired": self.swept_expired,
+            "swept_accepted": self.swept_accepted,
+            "last_swept": self.last_swept,
+            "last_duration_seconds": self.last_duration_seconds,
+        }
+
+
+invite_sweeper = InviteSweeper(
+    INVITE_SWEEP_BATCH_SIZE,
+    INVITE_SWEEP_TIME_BUDGET,
+    timedelta(days=INVITE_SWEEP_GRACE_DAYS),
+    INVITE_SWEEP_ARCHIVE,
+)
+register_collector("invite_sweeper", invite_sweeper.stats)
+
+
+def schedule_invite_sweep(job_scheduler):
+    """
+    Register the periodic sweep of expired and accepted invites.
+
+    Args:
+    job_scheduler (JobScheduler) : Application scheduler.
+    """
+    job_scheduler.add_job(
+        invite_sweeper.run,
+        'interval',
+        seconds=INVITE_SWEEP_SECONDS,
+        id="sweep_invites",
+        jobstore="local",
+        replace_existing=True,
+    )
@@ -1,10 +1,12 @@
 import os
-import smtplib
+import asyncio
 from dotenv import load_dotenv
 from email.mime.text import MIMEText
-from jinja2 import Environment, FileSystemLoader
 from celery import shared_task
 
+from app.core.utils.smtp import smtp_pool
+from app.core.utils.templates import template_registry
+
 
 load_dotenv()
 
@@ -14,9 +16,32 @@ SMTP_USERNAME = os.getenv("SMTP_USERNAME")
 SMTP_PASSWORD = os.getenv("APP_PASSWORD")
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 
+_task_loop = None
+
+def run_in_task_loop(coroutine):
+    """
+    Run a coroutine from a synchronous task on this process's event loop.
+
+    Tasks share one long-lived loop instead of starting a new one each, so
+    the SMTP pool keeps its connections open between tasks.
+
+    Args:
+    coroutine (Coroutine) : Coroutine to run.
+
+    Returns:
+    Any : Result of the coroutine.
+    """
+    global _task_loop
+    if _task_loop is None or _task_loop.is_closed():
+        _task_loop = asyncio.new_event_loop()
+    return _task_loop.run_until_complete(coroutine)
+
 def read_html_file(file_path):
     """
     Read HTML file and return content.
+
+    Files in the mailer template directory are served from the template
+    registry, so they are only read from disk once.
     
     Args:
     file_path (str) : Path to HTML file.
@@ -24,6 +49,10 @@ def read_html_file(file_path):
     Returns:
     str : HTML content.
     """
+    template_name = os.path.relpath(file_path, template_registry.directory)
+    if not template_name.startswith(os.pardir):
+        return template_registry.render_static(template_name)
+
     with open(file_path, 'r') as file:
         return file.read()
     
@@ -36,13 +65,11 @@ def render_template(template_name, context):
     context (dict) : Context to render the template.
     """
 
-    env = Environment(loader=FileSystemLoader('app/mailer'))
-    template = env.get_template(template_name)
-    return template.render(context)
+    return template_registry.render(template_name, context)
 
-def send_email(recipient_email, subject, html_content):
+async def send_email(recipient_email, subject, html_content):
     """
-    Send email via SMTP.
+    Send email over a pooled SMTP connection.
     
     Args:
     recipient_email (str) : Recipient email.
@@ -61,17 +88,22 @@ def send_email(recipient_email, subject, html_content):
     message['To'] = recipient_email
 
     try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.ehlo()
-        server.login(SENDER_EMAIL, SMTP_PASSWORD)
-        server.sendmail(SENDER_EMAIL, recipient_email, message.as_string())
-        server.close()
+        await smtp_pool.send(message)
         print("Email sent successfully!")
 
     except Exception as e:
         print(f"Failed to send email: {e}")
 
-def send_login_email(recipient_email):
+async def send_emails(messages):
+    """
+    Send a batch of emails concurrently over the pooled SMTP connections.
+
+    Args:
+    messages (list) : (recipient_email, subject, html_content) tuples.
+    """
+    await asyncio.gather(*(send_email(*message) for message in messages))
+
+async def send_login_email(recipient_email):
     """
     Send email that the user is logged in via SMTP.
 
@@ -79,9 +111,9 @@ def send_login_email(recipient_email):
     recipient_email (str) : Recipient email.
     """
     html_content = read_html_file("app/mailer/signin.html")
-    send_email(recipient_email, "You are signed in to Elencho!", html_content)
+    await send_email(recipient_email, "You are signed in to Elencho!", html_content)
 
-def send_update_pwd_email(recipient_email):
+async def send_update_pwd_email(recipient_email):
     """
     Send email that the user updated password via SMTP.
     
@@ -89,7 +121,7 @@ def send_update_pwd_email(recipient_email):
     recipient_email (str) : Recipient email.
     """
     html_content = read_html_file("app/mailer/change_pwd.html")
-    send_email(recipient_email, "Password Reset Detected!", html_content)
+    await send_email(recipient_email, "Password Reset Detected!", html_content)
 
 @shared_task
 def send_invite_email(recipient_email, invite_id):
@@ -106,7 +138,7 @@ def send_invite_email(recipient_email, invite_id):
     }
     html_content = render_template("invite.html", context)
 
-    send_email(recipient_email, "You are invited to join Elencho!", html_content)
+    run_in_task_loop(send_email(recipient_email, "You are invited to join Elencho!", html_content))
 
 
 
@@ -0,0 +1,38 @@
+from fastapi import Request
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.member import Member
+
+
+async def is_member(request: Request, db: AsyncSession, org_id: int, user_id: int = None):
+    """
+    Check whether a user is a member of an organisation.
+
+    The check is a single EXISTS lookup on (org_id, user_id), so its cost does
+    not depend on the size of the organisation. Answers are memoised on the
+    request, so repeated checks within one request hit the database once.
+
+    Args:
+    request (Request) : Request object.
+    db (AsyncSession) : Async database session.
+    org_id (int) : Organisation id.
+    user_id (int) : User id, defaults to the authenticated user.
+
+    Returns:
+    bool : True if the user is a member, False otherwise.
+    """
+    if user_id is None:
+        user_id = request.state.user.id
+
+    memo = getattr(request.state, "memberships", None)
+    if memo is None:
+        memo = request.state.memberships = {}
+
+    key = (org_id, user_id)
+    if key not in memo:
+        memo[key] = bool(await db.scalar(
+            select(exists().where(Member.org_id == org_id, Member.user_id == user_id))
+        ))
+    return memo[key]
+
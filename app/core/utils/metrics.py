@@ -0,0 +1,269 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+
+from dotenv import load_dotenv
+from os import getenv
+
+load_dotenv()
+
+METRICS_LATENCY_BUCKETS = [
+    float(bucket)
+    for bucket in getenv("METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10").split(",")
+]
+METRICS_QUERY_BUCKETS = [1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+
+_collectors = {}
+_lock = Lock()
+
+
+def register_collector(name: str, collector):
+    """
+    Register a callable that reports the counters of a subsystem.
+
+    Args:
+    name (str) : Name the counters are published under.
+    collector (callable) : Callable returning a flat dict of numeric counters.
+    """
+    with _lock:
+        _collectors[name] = collector
+
+
+def collect():
+    """
+    Collect the counters of every registered subsystem.
+
+    Returns:
+    dict : Counters keyed by subsystem name.
+    """
+    with _lock:
+        collectors = dict(_collectors)
+
+    return {name: collector() for name, collector in collectors.items()}
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with labels.
+
+    Attributes:
+    name (str) : Metric name.
+    description (str) : Help text of the metric.
+    labels (tuple) : Label names.
+    """
+
+    def __init__(self, name: str, description: str, labels: tuple):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values = defaultdict(float)
+        self._lock = Lock()
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        """
+        Increase the counter of a label set.
+
+        Args:
+        label_values (tuple) : Label values, in the order of the label names.
+        amount (float) : Amount to add.
+        """
+        with self._lock:
+            self._values[label_values] += amount
+
+    def render(self):
+        """
+        Render the counter in the Prometheus text format.
+
+        Returns:
+        list : Lines of the exposition.
+        """
+        with self._lock:
+            values = dict(self._values)
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets and labels.
+
+    Attributes:
+    name (str) : Metric name.
+    description (str) : Help text of the metric.
+    labels (tuple) : Label names.
+    buckets (list) : Sorted upper bounds of the buckets.
+    """
+
+    def __init__(self, name: str, description: str, labels: tuple, buckets: list):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = sorted(buckets)
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, label_values: tuple, value: float):
+        """
+        Record an observation for a label set.
+
+        Args:
+        label_values (tuple) : Label values, in the order of the label names.
+        value (float) : Observed value.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """
+        Render the histogram in the Prometheus text format.
+
+        Returns:
+        list : Lines of the exposition.
+        """
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for label_values, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, label_values + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Work done on behalf of the request being handled.
+
+    Attributes:
+    queries (int) : Number of database statements executed.
+    seconds (defaultdict) : Seconds spent per component. (db, hashing, smtp)
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = defaultdict(float)
+
+
+request_metrics: ContextVar = ContextVar("request_metrics", default=None)
+
+
+def record_query(seconds: float):
+    """
+    Attribute a database statement to the current request.
+
+    Args:
+    seconds (float) : Execution time of the statement.
+    """
+    current = request_metrics.get()
+    if current is not None:
+        current.queries += 1
+        current.seconds["db"] += seconds
+
+
+def record_time(component: str, seconds: float):
+    """
+    Attribute time spent in a component to the current request.
+
+    Args:
+    component (str) : Component name.
+    seconds (float) : Time spent.
+    """
+    current = request_metrics.get()
+    if current is not None:
+        current.seconds[component] += seconds
+
+
+http_requests = Counter(
+    "http_requests_total",
+    "Requests handled, by route and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route.",
+    ("method", "route"),
+    METRICS_LATENCY_BUCKETS,
+)
+http_request_queries = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per request, by route.",
+    ("method", "route"),
+    METRICS_QUERY_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing database statements per request, by route.",
+    ("method", "route"),
+    METRICS_LATENCY_BUCKETS,
+)
+http_request_component_seconds = Counter(
+    "http_request_component_seconds_total",
+    "Time spent in the database, password hashing and SMTP, by route.",
+    ("method", "route", "component"),
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, metrics: RequestMetrics):
+    """
+    Record a handled request.
+
+    Args:
+    method (str) : HTTP method.
+    route (str) : Route path template.
+    status (int) : Response status code.
+    seconds (float) : Request latency.
+    metrics (RequestMetrics) : Work done on behalf of the request.
+    """
+    http_requests.inc((method, route, str(status)))
+    http_request_duration.observe((method, route), seconds)
+    http_request_queries.observe((method, route), metrics.queries)
+    http_request_db_duration.observe((method, route), metrics.seconds["db"])
+    for component, component_seconds in metrics.seconds.items():
+        http_request_component_seconds.inc((method, route, component), component_seconds)
+
+
+def render_prometheus():
+    """
+    Render the request metrics and the subsystem counters in the Prometheus text format.
+
+    Subsystem counters are exposed as gauges named <subsystem>_<counter>.
+
+    Returns:
+    str : Prometheus text exposition.
+    """
+    lines = []
+    for metric in (http_requests, http_request_duration, http_request_queries, http_request_db_duration, http_request_component_seconds):
+        lines.extend(metric.render())
+
+    for subsystem, counters in collect().items():
+        for counter, value in counters.items():
+            name = f"{subsystem}_{counter}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {float(value)}")
+
+    return "\n".join(lines) + "\n"
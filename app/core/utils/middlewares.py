@@ -1,34 +1,154 @@
+from time import perf_counter
+from typing import NamedTuple
+
 from fastapi import Request, Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dotenv import load_dotenv
+from os import getenv
 
 from app.core.models.user import User
 
 from app.core.utils.auth import decode_access_token
+from app.core.utils.cache import TTLCache
 from app.core.utils.errors import unauthorized_error, credential_error
-from app.core.utils.dependencies import get_db
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.metrics import register_collector, request_metrics, RequestMetrics, observe_request
+from app.core.utils.revocation import revocation_list
+
+load_dotenv()
+
+PRINCIPAL_CACHE_SIZE = int(getenv("PRINCIPAL_CACHE_SIZE", 1024))
+PRINCIPAL_CACHE_TTL = float(getenv("PRINCIPAL_CACHE_TTL", 60))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+
+class Principal(NamedTuple):
+    """
+    Authenticated user attached to the request.
+
+    Attributes:
+    id (int) : Unique identifier for user.
+    email (str) : Email address of user.
+    """
+    id: int
+    email: str
+
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+register_collector("principal_cache", principal_cache.stats)
+
+
+def invalidate_principal(email: str):
+    """
+    Drop the cached principal of a user whose account has changed.
+
+    Args:
+    email (str) : Email address of user.
+    """
+    principal_cache.invalidate(email)
+
+
+async def load_principal(db: AsyncSession, email: str):
+    """
+    Get the principal of a user, from the principal cache when possible.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    email (str) : Email address of user.
+
+    Returns:
+    Principal : Principal of the user.
+    """
+    principal = principal_cache.get(email)
+    if principal is None:
+        result = await db.execute(select(User.id, User.email).where(User.email == email))
+        user = result.first()
+        if not user:
+            raise credential_error()
+
+        principal = Principal(id=user.id, email=user.email)
+        principal_cache.set(email, principal)
+
+    return principal
+
+
 async def authenticate_user(
-    request: Request, 
-    token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db_async)
 ):
     """
     Authenticate the user.
-    
+
+    Only access tokens that were not revoked are accepted. Revocation is
+    checked against the worker's revocation list, and the principal is
+    looked up in the principal cache first, so the database is only queried
+    on a cache miss.
+
     Args:
     request (Request) : Request object.
     token (str) : Access token.
-    db (Session) : Database session.
+    db (AsyncSession) : Async database session.
     """
     if not token:
         raise unauthorized_error()
     token_data = decode_access_token(token)
-
-    user = db.query(User).filter(User.email == token_data["sub"]).first()
-    if not user:
+    if not token_data or "sub" not in token_data or token_data.get("type") != "access":
+        raise credential_error()
+    if revocation_list.is_revoked(token_data.get("jti"), token_data["sub"], token_data.get("iat", 0)):
         raise credential_error()
-    
-    request.state.user = user
\ No newline at end of file
+
+    request.state.user = await load_principal(db, token_data["sub"])
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status codes and database work per route.
+
+    Requests are labelled with the path template of the matched route, so
+    path parameters do not create new series. Latency runs until the last
+    body chunk is sent; database, hashing and SMTP time is attributed to
+    the route until the app returns, so it includes background tasks.
+
+    Attributes:
+    app (ASGIApp) : Wrapped application.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = perf_counter()
+        finished = None
+
+        async def send_wrapper(message):
+            nonlocal status_code, finished
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = perf_counter()
+            await send(message)
+
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_metrics.reset(token)
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                (finished or perf_counter()) - started,
+                metrics,
+            )
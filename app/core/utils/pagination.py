@@ -0,0 +1,39 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from app.core.utils.errors import validation_error
+
+def encode_cursor(values: list):
+    """
+    Encode the keyset values of the last row of a page into a cursor.
+
+    Args:
+    values (list) : Values of the sort keys of the last row.
+
+    Returns:
+    str : Opaque cursor.
+    """
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str, types: list):
+    """
+    Decode a cursor into the keyset values it holds.
+
+    Args:
+    cursor (str) : Opaque cursor.
+    types (list) : Python type of each sort key, in order.
+
+    Returns:
+    list : Values of the sort keys.
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise validation_error("cursor")
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise validation_error("cursor")
+    for value, value_type in zip(values, types):
+        if not isinstance(value, value_type) or isinstance(value, bool):
+            raise validation_error("cursor")
+    return values
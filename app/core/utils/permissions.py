@@ -0,0 +1,137 @@
+from enum import IntFlag
+
+from fastapi import Request, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models.member import Member
+
+from app.core.utils.dependencies import get_db_async
+from app.core.utils.errors import unauthorized_error
+from app.core.utils.roles import role_directory
+
+
+class Permission(IntFlag):
+    """
+    Permissions a role can grant, stored together as a bitset on the role.
+    """
+    INVITE_MEMBERS = 1
+    MANAGE_ROLES = 2
+    REMOVE_MEMBERS = 4
+    VIEW_STATS = 8
+    VIEW_MEMBERS = 16
+
+
+ALL_PERMISSIONS = Permission(sum(Permission))
+
+# Permissions of the roles created with every organisation.
+DEFAULT_ROLE_PERMISSIONS = {
+    "owner": int(ALL_PERMISSIONS),
+    "member": int(Permission.INVITE_MEMBERS | Permission.VIEW_MEMBERS | Permission.VIEW_STATS),
+}
+
+
+class Authorizer:
+    """
+    Permissions of the authenticated user in each of their organisations.
+
+    Checks are a bitwise test against bitsets loaded once per request, so
+    any number of them costs no further queries.
+
+    Attributes:
+    grants (dict) : Permission bitsets keyed by organisation id.
+    """
+
+    def __init__(self, grants: dict):
+        self.grants = grants
+
+    def permissions(self, org_id: int):
+        """
+        Get the permissions of the user in an organisation.
+
+        Args:
+        org_id (int) : Organisation id.
+
+        Returns:
+        int : Permission bitset, 0 if the user is not a member.
+        """
+        return self.grants.get(org_id, 0)
+
+    def can(self, org_id: int, permission: Permission):
+        """
+        Check whether the user has a permission in an organisation.
+
+        Args:
+        org_id (int) : Organisation id.
+        permission (Permission) : Permission, or several combined with |.
+
+        Returns:
+        bool : True if every requested permission is granted, False otherwise.
+        """
+        return self.permissions(org_id) & permission == permission
+
+    def require(self, org_id: int, permission: Permission):
+        """
+        Ensure the user has a permission in an organisation.
+
+        Args:
+        org_id (int) : Organisation id.
+        permission (Permission) : Permission, or several combined with |.
+        """
+        if not self.can(org_id, permission):
+            raise unauthorized_error()
+
+    def orgs_with(self, permission: Permission):
+        """
+        Get the organisations in which the user has a permission.
+
+        Args:
+        permission (Permission) : Permission, or several combined with |.
+
+        Returns:
+        list : Organisation ids.
+        """
+        return [org_id for org_id, bits in self.grants.items() if bits & permission == permission]
+
+    def require_any(self, permission: Permission):
+        """
+        Ensure the user has a permission in at least one organisation.
+
+        Args:
+        permission (Permission) : Permission, or several combined with |.
+
+        Returns:
+        list : Ids of the organisations in which the permission is granted.
+        """
+        org_ids = self.orgs_with(permission)
+        if not org_ids:
+            raise unauthorized_error()
+        return org_ids
+
+
+async def get_authorizer(request: Request, db: AsyncSession = Depends(get_db_async)):
+    """
+    Load the permissions of the authenticated user.
+
+    The user's memberships are read with one query; the bitsets of their
+    roles come from the role directory. The result is kept on the request.
+
+    Args:
+    request (Request) : Request object.
+    db (AsyncSession) : Async database session.
+
+    Returns:
+    Authorizer : Permissions of the user.
+    """
+    authorizer = getattr(request.state, "authorizer", None)
+    if authorizer is None:
+        memberships = (await db.execute(
+            select(Member.org_id, Member.role_id).where(Member.user_id == request.state.user.id)
+        )).all()
+        bitsets = await role_directory.permissions(db, [tuple(membership) for membership in memberships])
+
+        grants = {}
+        for org_id, role_id in memberships:
+            grants[org_id] = grants.get(org_id, 0) | bitsets.get((org_id, role_id), 0)
+        authorizer = request.state.authorizer = Authorizer(grants)
+    return authorizer
@@ -0,0 +1,127 @@
+import logging
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from fastapi import Depends, Request
+
+from dotenv import load_dotenv
+from os import getenv
+
+load_dotenv()
+
+QUERY_BUDGET_MODE = getenv("QUERY_BUDGET_MODE", "warn")
+
+logger = logging.getLogger(__name__)
+
+_active_budgets: ContextVar = ContextVar("active_budgets", default=())
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """
+    Raised when a block issues more statements than its budget allows.
+    """
+
+
+def count_query():
+    """
+    Count a statement against every query budget active in the current context.
+    """
+    for budget in _active_budgets.get():
+        budget.count += 1
+
+
+class QueryBudget:
+    """
+    Limit on the number of database statements a block of code may issue.
+
+    Statements are counted through the engine events while the budget is
+    active, including those issued from nested budgets. Going over the limit
+    is logged in warn mode and raises QueryBudgetExceeded in raise mode;
+    the off mode disables the check.
+
+    Use it as a context manager, or as a decorator to give every call of a
+    function its own budget:
+
+        with QueryBudget(3, "accept invite"):
+            ...
+
+        @QueryBudget(2)
+        async def load_members(db): ...
+
+    Attributes:
+    limit (int) : Maximum number of statements.
+    name (str) : Name reported when the budget is exceeded.
+    mode (str) : What to do when the budget is exceeded. (off, warn, raise)
+    count (int) : Statements issued so far.
+    """
+
+    def __init__(self, limit: int, name: str = None, mode: str = None):
+        self.limit = limit
+        self.name = name
+        self.mode = mode or QUERY_BUDGET_MODE
+        self.count = 0
+        self._token = None
+
+    def __enter__(self):
+        self.count = 0
+        if self.mode != "off":
+            self._token = _active_budgets.set(_active_budgets.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._token is not None:
+            _active_budgets.reset(self._token)
+            self._token = None
+
+        if exc_type is None:
+            self.check()
+
+    def check(self):
+        """
+        Report the budget if more statements were issued than it allows.
+        """
+        if self.mode == "off" or self.count <= self.limit:
+            return
+
+        message = f"Query budget of {self.name or 'block'} exceeded: {self.count} statements, budget {self.limit}"
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    def __call__(self, fn):
+        name = self.name or fn.__qualname__
+
+        if iscoroutinefunction(fn):
+            @wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with QueryBudget(self.limit, name, self.mode):
+                    return await fn(*args, **kwargs)
+        else:
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with QueryBudget(self.limit, name, self.mode):
+                    return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def query_budget(limit: int):
+    """
+    Route dependency declaring the statement budget of an endpoint.
+
+    Statements issued by dependencies resolved before it, such as the
+    authentication of the router, are not counted.
+
+    Args:
+    limit (int) : Maximum number of statements.
+
+    Returns:
+    Depends : Dependency to add to the route's dependencies.
+    """
+    async def dependency(request: Request):
+        route = request.scope.get("route")
+        with QueryBudget(limit, f"{request.method} {getattr(route, 'path', request.url.path)}"):
+            yield
+
+    return Depends(dependency)
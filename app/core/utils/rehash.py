@@ -0,0 +1,139 @@
+import logging
+import asyncio
+
+from sqlalchemy import update, bindparam
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.models.user import User
+
+from app.core.utils.database import AsyncSessionLocal
+from app.core.utils.metrics import register_collector
+
+load_dotenv()
+
+REHASH_FLUSH_SECONDS = float(getenv("REHASH_FLUSH_SECONDS", 5))
+REHASH_BATCH_SIZE = int(getenv("REHASH_BATCH_SIZE", 500))
+
+logger = logging.getLogger(__name__)
+
+
+class RehashQueue:
+    """
+    Queue of password hashes upgraded at login, written in batches.
+
+    Logins only enqueue the new hash; a background task writes the queue
+    every flush interval, or as soon as it holds a full batch, with one
+    executemany UPDATE. A hash is only replaced if it is still the one the
+    login verified, so a password changed in the meantime is never
+    overwritten. Pending hashes are written on shutdown; any lost in a crash
+    are simply upgraded at a later login.
+
+    Attributes:
+    flush_seconds (float) : Interval between two writes.
+    batch_size (int) : Queue length that triggers an early write.
+    """
+
+    def __init__(self, flush_seconds: float, batch_size: int):
+        self.flush_seconds = flush_seconds
+        self.batch_size = max(1, batch_size)
+        self._pending = {}
+        self._flush_task = None
+        self._wakeup = None
+
+        self.queued = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def enqueue(self, user_id: int, old_hash: str, new_hash: str):
+        """
+        Queue the new hash of a user's password.
+
+        Args:
+        user_id (int) : User id.
+        old_hash (str) : Hash verified at login.
+        new_hash (str) : Hash at the configured cost.
+        """
+        self._pending[user_id] = (old_hash, new_hash)
+        self.queued += 1
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        """
+        Write every queued hash.
+        """
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        rows = [
+            {"user_id": user_id, "old_hash": old_hash, "new_hash": new_hash}
+            for user_id, (old_hash, new_hash) in pending.items()
+        ]
+        try:
+            async with AsyncSessionLocal() as db:
+                connection = await db.connection()
+                result = await connection.execute(
+                    update(User.__table__)
+                    .where(User.id == bindparam("user_id"), User.password == bindparam("old_hash"))
+                    .values(password=bindparam("new_hash")),
+                    rows,
+                )
+                await db.commit()
+        except Exception:
+            self.failed += len(rows)
+            logger.exception("Password rehash write failed")
+            return
+
+        # Drivers that cannot report the rows matched by an executemany return -1.
+        updated = result.rowcount if result.rowcount >= 0 else len(rows)
+        self.updated += updated
+        self.skipped += len(rows) - updated
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        """
+        Start writing the queue in the background.
+        """
+        self._wakeup = asyncio.Event()
+        self._flush_task = asyncio.get_running_loop().create_task(self._run())
+
+    async def shutdown(self):
+        """
+        Stop the background writes and write what is still queued.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._wakeup = None
+        await self.flush()
+
+    def stats(self):
+        """
+        Get the rehash counters.
+
+        Returns:
+        dict : Pending, queued, updated, skipped and failed hash counts.
+        """
+        return {
+            "pending": len(self._pending),
+            "queued": self.queued,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+
+
+rehash_queue = RehashQueue(REHASH_FLUSH_SECONDS, REHASH_BATCH_SIZE)
+register_collector("rehash", rehash_queue.stats)
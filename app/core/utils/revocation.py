@@ -0,0 +1,279 @@
+import logging
+import asyncio
+from hashlib import blake2b
+from time import time
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.models.revoked_token import RevokedToken
+
+from app.core.utils.database import AsyncSessionLocal
+from app.core.utils.metrics import register_collector
+
+load_dotenv()
+
+REVOCATION_SYNC_SECONDS = float(getenv("REVOCATION_SYNC_SECONDS", 5))
+REVOCATION_PURGE_SECONDS = int(getenv("REVOCATION_PURGE_SECONDS", 3600))
+REVOCATION_BLOOM_BITS = int(getenv("REVOCATION_BLOOM_BITS", 1 << 20))
+REVOCATION_BLOOM_HASHES = int(getenv("REVOCATION_BLOOM_HASHES", 7))
+
+# Rows are read again from this many ids below the last one seen, so a
+# revocation whose id was assigned before, but committed after, a newer one
+# is still picked up.
+REVOCATION_SYNC_OVERLAP = 100
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed size Bloom filter of strings.
+
+    Attributes:
+    bits (int) : Number of bits in the filter.
+    hashes (int) : Number of bit positions set per key.
+    """
+
+    def __init__(self, bits: int, hashes: int):
+        self.bits = max(8, bits)
+        self.hashes = max(1, hashes)
+        self._array = bytearray(self.bits // 8 + 1)
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, key: str):
+        """
+        Add a key to the filter.
+
+        Args:
+        key (str) : Key to add.
+        """
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str):
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """
+    Per-worker copy of the revocation store, checked without a database query.
+
+    Revoked token ids are kept in a Bloom filter in front of an exact set, so
+    the common case of a token that was never revoked is answered by the
+    filter alone. Subjects whose tokens were all revoked are kept with the
+    revocation time. The copy is synced incrementally from the
+    revoked_token table every sync interval, so revocations made on another
+    worker take effect within that interval; revocations made on this worker
+    take effect at once. Entries are dropped when the tokens they revoke
+    have expired.
+
+    Attributes:
+    sync_seconds (float) : Interval between two syncs.
+    """
+
+    def __init__(self, sync_seconds: float, bloom_bits: int, bloom_hashes: int):
+        self.sync_seconds = sync_seconds
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self._bloom = BloomFilter(bloom_bits, bloom_hashes)
+        self._jtis = {}
+        self._subjects = {}
+        self._last_id = 0
+        self._poll_task = None
+
+        self.syncs = 0
+        self.sync_failures = 0
+        self.rejected = 0
+        self.bloom_false_positives = 0
+
+    def _add(self, jti: str, subject: str, revoked_at: float, expires_at: int):
+        if jti:
+            self._jtis[jti] = expires_at
+            self._bloom.add(jti)
+        if subject:
+            cutoff, _ = self._subjects.get(subject, (0, 0))
+            if revoked_at >= cutoff:
+                self._subjects[subject] = (revoked_at, expires_at)
+
+    def _expire(self, now: int):
+        expired_jtis = [jti for jti, expires_at in self._jtis.items() if expires_at <= now]
+        for jti in expired_jtis:
+            del self._jtis[jti]
+        for subject in [subject for subject, (_, expires_at) in self._subjects.items() if expires_at <= now]:
+            del self._subjects[subject]
+
+        if expired_jtis:
+            bloom = BloomFilter(self.bloom_bits, self.bloom_hashes)
+            for jti in self._jtis:
+                bloom.add(jti)
+            self._bloom = bloom
+
+    def is_revoked(self, jti: str, subject: str, issued_at: float):
+        """
+        Check whether a token was revoked.
+
+        Args:
+        jti (str) : Unique identifier of the token.
+        subject (str) : Subject of the token.
+        issued_at (float) : Issue timestamp of the token.
+
+        Returns:
+        bool : True if the token was revoked, False otherwise.
+        """
+        revoked = False
+        entry = self._subjects.get(subject)
+        if entry is not None and issued_at <= entry[0]:
+            revoked = True
+        elif jti and jti in self._bloom:
+            revoked = jti in self._jtis
+            if not revoked:
+                self.bloom_false_positives += 1
+
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    async def sync(self, db: AsyncSession):
+        """
+        Load the revocations added since the last sync and drop expired ones.
+
+        Args:
+        db (AsyncSession) : Async database session.
+        """
+        now = int(time())
+        result = await db.execute(
+            select(RevokedToken.id, RevokedToken.jti, RevokedToken.subject, RevokedToken.revoked_at, RevokedToken.expires_at)
+            .where(RevokedToken.id > self._last_id - REVOCATION_SYNC_OVERLAP, RevokedToken.expires_at > now)
+            .order_by(RevokedToken.id)
+        )
+        for row in result:
+            self._add(row.jti, row.subject, row.revoked_at, row.expires_at)
+            self._last_id = max(self._last_id, row.id)
+
+        self._expire(now)
+        self.syncs += 1
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.sync(db)
+            except Exception:
+                self.sync_failures += 1
+                logger.exception("Token revocation sync failed")
+
+    async def start(self):
+        """
+        Load the revocation store and start syncing it.
+        """
+        async with AsyncSessionLocal() as db:
+            await self.sync(db)
+        self._poll_task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def shutdown(self):
+        """
+        Stop syncing.
+        """
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+    def apply(self, revocation: RevokedToken):
+        """
+        Apply a committed revocation to this worker without waiting for the next sync.
+
+        Args:
+        revocation (RevokedToken) : Committed revocation.
+        """
+        self._add(revocation.jti, revocation.subject, revocation.revoked_at, revocation.expires_at)
+
+    def stats(self):
+        """
+        Get the revocation list counters.
+
+        Returns:
+        dict : Revoked tokens and subjects held, sync and rejection counters.
+        """
+        return {
+            "tokens": len(self._jtis),
+            "subjects": len(self._subjects),
+            "last_id": self._last_id,
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+            "rejected": self.rejected,
+            "bloom_false_positives": self.bloom_false_positives,
+        }
+
+
+revocation_list = RevocationList(REVOCATION_SYNC_SECONDS, REVOCATION_BLOOM_BITS, REVOCATION_BLOOM_HASHES)
+register_collector("revocation", revocation_list.stats)
+
+
+def revoke_token(db: AsyncSession, jti: str, expires_at: int):
+    """
+    Revoke a single token. Takes effect when the session is committed.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    jti (str) : Unique identifier of the token.
+    expires_at (int) : Expiry timestamp of the token.
+
+    Returns:
+    RevokedToken : Revocation to pass to revocation_list.apply after the commit.
+    """
+    revocation = RevokedToken(jti=jti, revoked_at=time(), expires_at=expires_at)
+    db.add(revocation)
+    return revocation
+
+
+def revoke_subject(db: AsyncSession, subject: str, lifetime_seconds: int):
+    """
+    Revoke every token of a subject issued until now. Takes effect when the session is committed.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    subject (str) : Email address of user.
+    lifetime_seconds (int) : Longest lifetime of the tokens to revoke.
+
+    Returns:
+    RevokedToken : Revocation to pass to revocation_list.apply after the commit.
+    """
+    now = time()
+    revocation = RevokedToken(subject=subject, revoked_at=now, expires_at=int(now) + lifetime_seconds + 1)
+    db.add(revocation)
+    return revocation
+
+
+async def purge_revoked_tokens():
+    """
+    Delete the revocations whose tokens have all expired.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(time())))
+        await db.commit()
+
+
+def schedule_revocation_purge(job_scheduler):
+    """
+    Register the periodic purge of expired revocations.
+
+    Args:
+    job_scheduler (JobScheduler) : Application scheduler.
+    """
+    job_scheduler.add_job(
+        purge_revoked_tokens,
+        'interval',
+        seconds=REVOCATION_PURGE_SECONDS,
+        id="purge_revoked_tokens",
+        jobstore="local",
+        replace_existing=True,
+    )
@@ -0,0 +1,117 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.models.role import Role
+
+from app.core.utils.cache import TTLCache
+from app.core.utils.metrics import register_collector
+
+load_dotenv()
+
+ROLE_CACHE_SIZE = int(getenv("ROLE_CACHE_SIZE", 4096))
+ROLE_CACHE_TTL = float(getenv("ROLE_CACHE_TTL", 300))
+
+
+class RoleDirectory:
+    """
+    Resolves role names to role ids, and roles to their permission bitsets,
+    within an organisation.
+
+    Ids are cached per worker under (org_id, role_name) and bitsets under
+    (org_id, role_id). The caches are primed when an organisation's roles are
+    created, so the common lookups never reach the database; a role id miss
+    is resolved with one indexed query on (org_id, name), and bitset misses
+    with one query for all the missing roles. Names that do not resolve are
+    not cached.
+
+    Attributes:
+    cache (TTLCache) : Cached role ids keyed by (org_id, role_name).
+    permission_cache (TTLCache) : Cached permission bitsets keyed by (org_id, role_id).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.permission_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def prime(self, org_id: int, roles: list):
+        """
+        Store the ids and permissions of roles that were just created.
+
+        Args:
+        org_id (int) : Organisation id.
+        roles (list) : Roles of the organisation.
+        """
+        for role in roles:
+            self.cache.set((org_id, role.name), role.id)
+            self.permission_cache.set((org_id, role.id), role.permissions)
+
+    def invalidate(self, org_id: int, name: str, role_id: int = None):
+        """
+        Drop a cached role after the role was renamed, deleted or given other permissions.
+
+        Args:
+        org_id (int) : Organisation id.
+        name (str) : Name of role.
+        role_id (int) : Role id, to also drop its permissions.
+        """
+        self.cache.invalidate((org_id, name))
+        if role_id is not None:
+            self.permission_cache.invalidate((org_id, role_id))
+
+    async def resolve(self, db: AsyncSession, org_id: int, name: str):
+        """
+        Get the id of a role of an organisation.
+
+        Args:
+        db (AsyncSession) : Async database session.
+        org_id (int) : Organisation id.
+        name (str) : Name of role.
+
+        Returns:
+        int : Role id, or None if the organisation has no such role.
+        """
+        role_id = self.cache.get((org_id, name))
+        if role_id is None:
+            role_id = await db.scalar(
+                select(Role.id).where(Role.org_id == org_id, Role.name == name).limit(1)
+            )
+            if role_id is not None:
+                self.cache.set((org_id, name), role_id)
+        return role_id
+
+    async def permissions(self, db: AsyncSession, roles: list):
+        """
+        Get the permission bitsets of roles.
+
+        Args:
+        db (AsyncSession) : Async database session.
+        roles (list) : (org_id, role_id) pairs.
+
+        Returns:
+        dict : Permission bitsets keyed by (org_id, role_id).
+        """
+        bitsets, missing = {}, []
+        for key in roles:
+            bits = self.permission_cache.get(key)
+            if bits is None:
+                missing.append(key)
+            else:
+                bitsets[key] = bits
+
+        if missing:
+            result = await db.execute(
+                select(Role.org_id, Role.id, Role.permissions).where(Role.id.in_([role_id for _, role_id in missing]))
+            )
+            for org_id, role_id, bits in result:
+                bitsets[(org_id, role_id)] = bits
+                self.permission_cache.set((org_id, role_id), bits)
+
+        return bitsets
+
+
+role_directory = RoleDirectory(ROLE_CACHE_SIZE, ROLE_CACHE_TTL)
+register_collector("role_directory", role_directory.cache.stats)
+register_collector("role_permissions", role_directory.permission_cache.stats)
@@ -0,0 +1,199 @@
+import asyncio
+import socket
+from contextlib import asynccontextmanager
+from time import monotonic
+
+import aiosmtplib
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.utils.metrics import register_collector, record_time
+
+load_dotenv()
+
+SMTP_HOST = getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(getenv("SMTP_PORT", 465))
+SMTP_USE_TLS = getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_START_TLS = getenv("SMTP_START_TLS", "false").lower() == "true"
+SMTP_TIMEOUT = float(getenv("SMTP_TIMEOUT", 10))
+SMTP_POOL_SIZE = int(getenv("SMTP_POOL_SIZE", 4))
+SMTP_IDLE_CHECK_SECONDS = float(getenv("SMTP_IDLE_CHECK_SECONDS", 30))
+SMTP_MAX_IDLE_SECONDS = float(getenv("SMTP_MAX_IDLE_SECONDS", 240))
+
+SMTP_USERNAME = getenv("SMTP_USERNAME") or getenv("SENDER_EMAIL")
+SMTP_PASSWORD = getenv("APP_PASSWORD")
+
+
+class SMTPPool:
+    """
+    Pool of authenticated SMTP connections that are kept alive and reused.
+
+    A connection idle for longer than idle_check_seconds is checked with NOOP
+    before it is reused, and one idle for longer than max_idle_seconds is
+    dropped. A send that fails on a broken connection is retried once on a
+    fresh connection. Connections belong to the event loop that opened them;
+    when the pool is used from another loop, the previous loop's idle
+    connections are closed.
+
+    Attributes:
+    size (int) : Maximum number of open connections.
+    idle_check_seconds (float) : Idle time after which a connection is checked with NOOP.
+    max_idle_seconds (float) : Idle time after which a connection is closed instead of reused.
+    """
+
+    def __init__(self, size: int, idle_check_seconds: float, max_idle_seconds: float):
+        self.size = max(1, size)
+        self.idle_check_seconds = idle_check_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._idle = []
+        self._semaphore = None
+        self._loop = None
+
+        self.connects = 0
+        self.reuses = 0
+        self.health_check_failures = 0
+        self.sent = 0
+        self.failed = 0
+        self.abandoned = 0
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            stale, self._idle = self._idle, []
+            for client, _ in stale:
+                self._abandon(client)
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.size)
+
+    def _abandon(self, client):
+        # The client belongs to another, usually closed, event loop, so it
+        # cannot QUIT. Close its transport, or at least shut the socket down
+        # so the connection is released at once.
+        try:
+            client.close()
+        except RuntimeError:
+            transport = client.transport
+            sock = transport.get_extra_info("socket") if transport is not None else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.abandoned += 1
+
+    async def _connect(self):
+        client = aiosmtplib.SMTP(
+            hostname=SMTP_HOST,
+            port=SMTP_PORT,
+            use_tls=SMTP_USE_TLS,
+            start_tls=SMTP_START_TLS,
+            timeout=SMTP_TIMEOUT,
+        )
+        await client.connect()
+        if SMTP_PASSWORD:
+            await client.login(SMTP_USERNAME, SMTP_PASSWORD)
+
+        self.connects += 1
+        return client
+
+    async def _discard(self, client):
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def _checkout(self):
+        while self._idle:
+            client, last_used = self._idle.pop()
+            idle_for = monotonic() - last_used
+
+            if idle_for > self.max_idle_seconds or not client.is_connected:
+                await self._discard(client)
+                continue
+
+            if idle_for > self.idle_check_seconds:
+                try:
+                    await client.noop()
+                except aiosmtplib.SMTPException:
+                    self.health_check_failures += 1
+                    await self._discard(client)
+                    continue
+
+            self.reuses += 1
+            return client
+
+        return await self._connect()
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Borrow a connection from the pool.
+
+        Yields:
+        SMTP : Connected and authenticated client.
+        """
+        self._bind()
+        async with self._semaphore:
+            client = await self._checkout()
+            try:
+                yield client
+            except Exception:
+                await self._discard(client)
+                raise
+            else:
+                self._idle.append((client, monotonic()))
+
+    async def send(self, message):
+        """
+        Send a message over a pooled connection.
+
+        Args:
+        message (Message) : Email message with From and To headers set.
+        """
+        started = monotonic()
+        try:
+            try:
+                async with self.connection() as client:
+                    await client.send_message(message)
+            except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError):
+                async with self.connection() as client:
+                    await client.send_message(message)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            record_time("smtp", monotonic() - started)
+
+        self.sent += 1
+
+    async def close(self):
+        """
+        Close every idle connection.
+        """
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._discard(client)
+
+    def stats(self):
+        """
+        Get the pool counters.
+
+        Returns:
+        dict : Idle connections, connects, reuses, failed health checks, send counts and abandoned connections.
+        """
+        return {
+            "idle": len(self._idle),
+            "size": self.size,
+            "connects": self.connects,
+            "reuses": self.reuses,
+            "health_check_failures": self.health_check_failures,
+            "sent": self.sent,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+        }
+
+
+smtp_pool = SMTPPool(SMTP_POOL_SIZE, SMTP_IDLE_CHECK_SECONDS, SMTP_MAX_IDLE_SECONDS)
+register_collector("smtp", smtp_pool.stats)
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, cast, delete, func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dotenv import load_dotenv
+from os import getenv
+
+from app.core.models.member import Member
+from app.core.models.member_stats import MemberStats
+
+from app.core.utils.database import AsyncSessionLocal, dialect_insert
+
+load_dotenv()
+
+STATS_RECONCILE_SECONDS = int(getenv("STATS_RECONCILE_SECONDS", 3600))
+
+def member_count_update(dialect_name: str, org_id: int, role_id: int, status: int, delta: int):
+    """
+    Build the upsert that adds delta to a member counter.
+
+    Args:
+    dialect_name (str) : Name of the database dialect.
+    org_id (int) : Organisation id.
+    role_id (int) : Role id.
+    status (int) : Member status.
+    delta (int) : Change of the member count.
+
+    Returns:
+    Insert : Upsert statement.
+    """
+    statement = dialect_insert(dialect_name, MemberStats).values(
+        org_id=org_id, role_id=role_id, status=status, count=delta
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[MemberStats.org_id, MemberStats.role_id, MemberStats.status],
+        set_={"count": MemberStats.count + statement.excluded.count},
+    )
+
+async def record_member_change_async(db: AsyncSession, org_id: int, role_id: int, status: int, delta: int):
+    """
+    Update the member counters in the current transaction.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    org_id (int) : Organisation id.
+    role_id (int) : Role id.
+    status (int) : Member status.
+    delta (int) : Change of the member count.
+    """
+    await db.execute(member_count_update(db.bind.dialect.name, org_id, role_id, status, delta))
+
+async def record_member_changes_async(db: AsyncSession, changes: dict):
+    """
+    Update several member counters in the current transaction with one statement.
+
+    Args:
+    db (AsyncSession) : Async database session.
+    changes (dict) : Changes of the member count keyed by (org_id, role_id, status).
+    """
+    rows = [
+        {"org_id": org_id, "role_id": role_id, "status": status, "count": delta}
+        for (org_id, role_id, status), delta in changes.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    statement = dialect_insert(db.bind.dialect.name, MemberStats.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=[MemberStats.org_id, MemberStats.role_id, MemberStats.status],
+        set_={"count": MemberStats.count + statement.excluded.count},
+    )
+    await db.execute(statement, rows)
+
+async def reconcile_member_stats():
+    """
+    Correct any drift of the member counters against the member table.
+
+    The true counts and the counters are read together in one statement,
+    so both come from the same snapshot and a member write committed in the
+    meantime is seen by neither. Only the counters that differ are adjusted,
+    by the difference, with one upsert; counters left at zero are then
+    deleted. Untouched counters are never locked, so live member writes
+    carry on during the reconciliation, and a change made by one of them in
+    the meantime is kept rather than overwritten.
+    """
+    counts = union_all(
+        select(Member.org_id, Member.role_id, Member.status, func.count(Member.id).label("delta"))
+        .group_by(Member.org_id, Member.role_id, Member.status),
+        select(MemberStats.org_id, MemberStats.role_id, MemberStats.status, (-MemberStats.count).label("delta")),
+    ).subquery()
+    delta = cast(func.sum(counts.c.delta), BigInteger)
+
+    async with AsyncSessionLocal() as db:
+        changes = {
+            (org_id, role_id, status): change
+            for org_id, role_id, status, change in await db.execute(
+                select(counts.c.org_id, counts.c.role_id, counts.c.status, delta)
+                .group_by(counts.c.org_id, counts.c.role_id, counts.c.status)
+                .having(delta != 0)
+            )
+        }
+        await record_member_changes_async(db, changes)
+        await db.execute(delete(MemberStats).where(MemberStats.count == 0))
+        await db.commit()
+
+def schedule_stats_reconciliation(job_scheduler):
+    """
+    Register the periodic member counter reconciliation.
+
+    The first run starts right away, so counters missing on a database that
+    predates them are filled at startup rather than an interval later.
+
+    Args:
+    job_scheduler (JobScheduler) : Application scheduler.
+    """
+    job_scheduler.add_job(
+        reconcile_member_stats,
+        'interval',
+        seconds=STATS_RECONCILE_SECONDS,
+        next_run_time=datetime.now(timezone.utc),
+        id="reconcile_member_stats",
+        jobstore="local",
+        replace_existing=True,
+    )
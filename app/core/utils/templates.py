@@ -0,0 +1,108 @@
+from threading import Lock
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+
+from dotenv import load_dotenv
+from os import getenv
+
+load_dotenv()
+
+APP_ENV = getenv("APP_ENV", "production")
+MAILER_TEMPLATE_DIR = getenv("MAILER_TEMPLATE_DIR", "app/mailer")
+MAILER_BYTECODE_CACHE_DIR = getenv("MAILER_BYTECODE_CACHE_DIR")
+
+
+class TemplateRegistry:
+    """
+    Process-wide registry of the compiled mailer templates.
+
+    Every template in the template directory is compiled once, and templates
+    rendered without a context are kept in memory as static bodies. In dev
+    mode templates are reloaded when they change on disk and nothing is
+    memoised.
+
+    Attributes:
+    directory (str) : Directory holding the templates.
+    auto_reload (bool) : Reload templates that changed on disk.
+    env (Environment) : Jinja2 environment shared by every render.
+    """
+
+    def __init__(self, directory: str, auto_reload: bool = False, bytecode_cache_dir: str = None):
+        self.directory = directory
+        self.auto_reload = auto_reload
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            auto_reload=auto_reload,
+            cache_size=-1,
+            keep_trailing_newline=True,
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache_dir else None,
+        )
+        self._templates = {}
+        self._static = {}
+        self._lock = Lock()
+
+    def load(self):
+        """
+        Compile every template in the template directory.
+        """
+        with self._lock:
+            for name in self.env.list_templates(extensions=["html"]):
+                self._templates[name] = self.env.get_template(name)
+
+    def get(self, template_name: str):
+        """
+        Get a compiled template.
+
+        Args:
+        template_name (str) : Name of the template.
+
+        Returns:
+        Template : Compiled template.
+        """
+        if self.auto_reload:
+            return self.env.get_template(template_name)
+
+        template = self._templates.get(template_name)
+        if template is None:
+            template = self.env.get_template(template_name)
+            self._templates[template_name] = template
+        return template
+
+    def render(self, template_name: str, context: dict):
+        """
+        Render a template.
+
+        Args:
+        template_name (str) : Name of the template.
+        context (dict) : Context to render the template.
+
+        Returns:
+        str : Rendered template.
+        """
+        return self.get(template_name).render(context)
+
+    def render_static(self, template_name: str):
+        """
+        Render a template that takes no context, reusing the rendered body.
+
+        Args:
+        template_name (str) : Name of the template.
+
+        Returns:
+        str : Rendered template.
+        """
+        if self.auto_reload:
+            return self.render(template_name, {})
+
+        body = self._static.get(template_name)
+        if body is None:
+            body = self.render(template_name, {})
+            self._static[template_name] = body
+        return body
+
+
+template_registry = TemplateRegistry(
+    MAILER_TEMPLATE_DIR,
+    auto_reload=APP_ENV == "dev",
+    bytecode_cache_dir=MAILER_BYTECODE_CACHE_DIR,
+)
@@ -0,0 +1,42 @@
+"""
+Pick the bcrypt cost for this host from a target hash time.
+
+Times bcrypt at increasing costs and prints the highest cost whose median
+hash time fits the target, to be set as BCRYPT_ROUNDS. Run it on the
+hardware the API runs on, since the result depends on the CPU.
+
+Usage:
+    python -m benchmarks.bcrypt_cost --target-ms 100
+"""
+import argparse
+import os
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=100, help="Target hash time in milliseconds.")
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per cost.")
+    parser.add_argument("--min-rounds", type=int, default=4)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.core.utils.hashing import BCRYPT_ROUNDS, calibrate_rounds
+
+    rounds, timings = calibrate_rounds(args.target_ms / 1000, args.samples, args.min_rounds, args.max_rounds)
+    for cost, seconds in timings.items():
+        marker = "  <- chosen" if cost == rounds else ""
+        print(f"rounds={cost:>2}: {seconds * 1000:9.2f} ms{marker}")
+
+    print(f"\nBCRYPT_ROUNDS={rounds}  (currently {BCRYPT_ROUNDS})")
+    if timings[rounds] > args.target_ms / 1000:
+        print(f"Even the lowest cost takes longer than {args.target_ms} ms on this host.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Show how the hot-path indexes change query plans on a seeded dataset.
+
+Seeds organisations, users, roles, members and invites into a scratch
+database, then explains and times the hot lookups once without and once
+with the indexes declared on the models.
+
+Usage:
+    python -m benchmarks.index_plans --database-uri postgresql://localhost/elenchos_bench
+
+The tables of the target database are dropped and recreated when --reset is
+given; without it the script refuses to run on a database that has users.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+
+HOT_INDEXES = {
+    "ix_member_user_id_org_id",
+    "ix_member_org_id_role_id",
+    "ix_member_role_id",
+    "ix_member_status_created_at",
+    "ix_member_org_id_id",
+    "ix_invites_email_status",
+    "ix_invites_pending_organisation_id_email",
+    "ix_invites_status_expires_at",
+    "ix_role_org_id_name",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-uri", required=True, help="Scratch database to seed.")
+    parser.add_argument("--orgs", type=int, default=500)
+    parser.add_argument("--members-per-org", type=int, default=40)
+    parser.add_argument("--invites-per-org", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=50, help="Timed executions per query.")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the tables first.")
+    return parser.parse_args()
+
+
+def seed(connection, orgs, members_per_org, invites_per_org):
+    from sqlalchemy import insert
+
+    from app.core.models.user import User
+    from app.core.models.organisation import Organisation
+    from app.core.models.role import Role
+    from app.core.models.member import Member
+    from app.core.models.invites import Invite
+
+    now = datetime.utcnow()
+    timestamp = int(now.timestamp())
+    users = orgs * members_per_org
+
+    connection.execute(insert(User), [
+        {"id": i, "email": f"user{i}@bench.test", "password": "x", "profile": {}, "status": 1}
+        for i in range(1, users + 1)
+    ])
+    connection.execute(insert(Organisation), [
+        {"id": i, "name": f"Organisation {i}", "status": 1} for i in range(1, orgs + 1)
+    ])
+    connection.execute(insert(Role), [
+        {"id": 2 * i - 1 + offset, "name": name, "org_id": i}
+        for i in range(1, orgs + 1)
+        for offset, name in enumerate(["owner", "member"])
+    ])
+    connection.execute(insert(Member), [
+        {
+            "org_id": org_id,
+            "user_id": (org_id - 1) * members_per_org + n,
+            "role_id": 2 * org_id - 1 if n == 1 else 2 * org_id,
+            "status": random.choice([0, 1, 1, 1]),
+            "created_at": timestamp - random.randint(0, 365 * 86400),
+        }
+        for org_id in range(1, orgs + 1)
+        for n in range(1, members_per_org + 1)
+    ])
+    connection.execute(insert(Invite), [
+        {
+            "email": f"invitee{org_id}-{n}@bench.test",
+            "organisation_id": org_id,
+            "status": random.choice(["pending", "accepted", "accepted"]),
+            "created_at": now,
+            "expires_at": now + timedelta(days=random.randint(-14, 7)),
+        }
+        for org_id in range(1, orgs + 1)
+        for n in range(invites_per_org)
+    ])
+
+
+def hot_queries(orgs, members_per_org):
+    from sqlalchemy import func, select
+
+    from app.core.models.role import Role
+    from app.core.models.member import Member
+    from app.core.models.invites import Invite
+
+    org_id = orgs // 2
+    user_id = (org_id - 1) * members_per_org + 2
+    since = int(datetime.utcnow().timestamp()) - 30 * 86400
+
+    return {
+        "member by (user_id, org_id)": select(Member.id).where(Member.user_id == user_id, Member.org_id == org_id),
+        "members by status and created_at": select(func.count(Member.id)).where(Member.status == 1, Member.created_at >= since),
+        "members of an org by role": select(Member.role_id, func.count(Member.id)).where(Member.org_id == org_id).group_by(Member.role_id),
+        "page of an org's members": select(Member.id, Member.user_id, Member.status)
+            .where(Member.org_id == org_id, Member.id > 0)
+            .order_by(Member.id)
+            .limit(20),
+        "invites by email and status": select(Invite.id).where(Invite.email == f"invitee{org_id}-3@bench.test", Invite.status == "pending"),
+        "pending invites of an org": select(Invite.email).where(
+            Invite.organisation_id == org_id,
+            Invite.status == "pending",
+            Invite.email.in_([f"invitee{org_id}-{n}@bench.test" for n in range(5)]),
+        ),
+        "batch of expired invites": select(Invite.id)
+            .where(Invite.status == "pending", Invite.expires_at < datetime.utcnow() - timedelta(days=1))
+            .order_by(Invite.expires_at)
+            .limit(500),
+        "role by (org_id, name)": select(Role.id).where(Role.org_id == org_id, Role.name == "member"),
+    }
+
+
+def explain(connection, query):
+    from sqlalchemy import text
+
+    sql = str(query.compile(connection, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    return "\n".join(" ".join(str(column) for column in row) for row in connection.execute(text(prefix + sql)))
+
+
+def time_query(connection, query, runs):
+    started = perf_counter()
+    for _ in range(runs):
+        connection.execute(query).all()
+    return (perf_counter() - started) / runs * 1000
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URI"] = args.database_uri
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from sqlalchemy import func, select, text
+
+    from app.core.utils.database import Base, engine
+    from app.core.models import user, member, role, organisation, invites, member_stats
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        if connection.execute(select(func.count()).select_from(user.User)).scalar():
+            sys.exit("The database already has users; run against a scratch database or pass --reset.")
+        seed(connection, args.orgs, args.members_per_org, args.invites_per_org)
+
+    indexes = [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name in HOT_INDEXES
+    ]
+    queries = hot_queries(args.orgs, args.members_per_org)
+
+    for phase in ("without indexes", "with indexes"):
+        with engine.begin() as connection:
+            for index in indexes:
+                if phase == "without indexes":
+                    index.drop(connection, checkfirst=True)
+                else:
+                    index.create(connection, checkfirst=True)
+            connection.execute(text("ANALYZE"))
+
+        print(f"==== {phase} ====")
+        with engine.connect() as connection:
+            for name, query in queries.items():
+                print(f"-- {name}: {time_query(connection, query, args.runs):.3f} ms")
+                print(explain(connection, query))
+                print()
+
+
+if __name__ == "__main__":
+    main()
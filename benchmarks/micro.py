@@ -0,0 +1,232 @@
+"""
+Microbenchmarks of the hot utility functions.
+
+Times password hashing and verification at several bcrypt costs, access and
+invite tokens, mailer template rendering and save_and_refresh against a
+database, and saves the results as JSON. Everything runs offline; the
+database defaults to a throwaway SQLite file.
+
+Usage:
+    python -m benchmarks.micro --output benchmarks/results.json
+    python -m benchmarks.micro --compare benchmarks/baseline.json
+
+With --compare, every benchmark whose best time is more than --threshold
+slower than in the baseline is reported as a regression and the script exits
+with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="File to save the results to.")
+    parser.add_argument("--compare", help="Baseline results to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before a benchmark is flagged.")
+    parser.add_argument("--database-uri", help="Database for save_and_refresh, defaults to a temporary SQLite file.")
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="+", default=[4, 8, 10, 12], help="bcrypt costs to time.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark.")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat.")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text.")
+    return parser.parse_args()
+
+
+def measure(fn, repeat, min_time):
+    """
+    Time a function.
+
+    The number of calls per repeat is picked so a repeat lasts at least
+    min_time seconds.
+
+    Args:
+    fn (callable) : Function to time.
+    repeat (int) : Number of timed repeats.
+    min_time (float) : Minimum seconds per repeat.
+
+    Returns:
+    dict : Best, mean and standard deviation of the seconds per call, and the calls per repeat.
+    """
+    timer = timeit.Timer(fn)
+    number, elapsed = 1, 0.0
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+    per_call = [timing / number for timing in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "best": min(per_call),
+        "mean": statistics.mean(per_call),
+        "stdev": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "number": number,
+    }
+
+
+def hashing_benchmarks(rounds):
+    from app.core.utils import hashing
+
+    benchmarks = {}
+    for cost in rounds:
+        context = hashing.crypt_context(cost)
+        hashed = context.hash("benchmark-password")
+
+        def hash_at_cost(context=context):
+            hashing.pwd_context, default = context, hashing.pwd_context
+            try:
+                hashing.hash_password("benchmark-password")
+            finally:
+                hashing.pwd_context = default
+
+        def verify_at_cost(context=context, hashed=hashed):
+            hashing.pwd_context, default = context, hashing.pwd_context
+            try:
+                hashing.check_password("benchmark-password", hashed)
+            finally:
+                hashing.pwd_context = default
+
+        benchmarks[f"hash_password[rounds={cost}]"] = hash_at_cost
+        benchmarks[f"check_password[rounds={cost}]"] = verify_at_cost
+    return benchmarks
+
+
+def token_benchmarks():
+    from app.core.utils.auth import create_access_token, decode_access_token
+    from app.core.utils.invitation import create_invite_token, verify_invite_token
+
+    access_token = create_access_token({"sub": "user@bench.test"})
+    invite_token = create_invite_token("user@bench.test", 1)
+
+    return {
+        "create_access_token": lambda: create_access_token({"sub": "user@bench.test"}),
+        "decode_access_token": lambda: decode_access_token(access_token),
+        "create_invite_token": lambda: create_invite_token("user@bench.test", 1),
+        "verify_invite_token": lambda: verify_invite_token(invite_token),
+    }
+
+
+def template_benchmarks():
+    from app.core.utils.mailers import read_html_file, render_template
+    from app.core.utils.templates import template_registry
+
+    template_registry.load()
+    context = {
+        "invite_link": "http://localhost:8000/invitations/accept?invite_id=token",
+        "reject_link": "http://localhost:8000/invitations/cancel?invite_id=token",
+    }
+    signin_path = os.path.join(template_registry.directory, "signin.html")
+
+    return {
+        "render_template[invite.html]": lambda: render_template("invite.html", context),
+        "read_html_file[signin.html]": lambda: read_html_file(signin_path),
+    }
+
+
+def database_benchmarks():
+    from app.core.models.organisation import Organisation
+    from app.core.utils.database import Base, SessionLocal, engine
+    from app.core.utils.dependencies import save_and_refresh
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    def save_organisation():
+        save_and_refresh(db, Organisation(name="Benchmark", status=1))
+
+    return {"save_and_refresh[organisation]": save_organisation}, db
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline and print the change of every benchmark.
+
+    Args:
+    results (dict) : Results of this run, keyed by benchmark name.
+    baseline (dict) : Baseline results, keyed by benchmark name.
+    threshold (float) : Allowed slowdown, as a fraction of the baseline.
+
+    Returns:
+    list : Names of the benchmarks that regressed.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:>40}: {result['best'] * 1e6:12.2f} us   (new)")
+            continue
+
+        change = result["best"] / baseline[name]["best"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:>40}: {result['best'] * 1e6:12.2f} us  {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["HASH_EXECUTOR"] = "thread"
+
+    scratch = None
+    if args.database_uri:
+        os.environ["DATABASE_URI"] = args.database_uri
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        os.environ["DATABASE_URI"] = f"sqlite:///{scratch.name}"
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.core.models import user, member, role, organisation, invites, member_stats
+
+    benchmarks = {}
+    benchmarks.update(hashing_benchmarks(args.bcrypt_rounds))
+    benchmarks.update(token_benchmarks())
+    benchmarks.update(template_benchmarks())
+    database, db = database_benchmarks()
+    benchmarks.update(database)
+
+    if args.filter:
+        benchmarks = {name: fn for name, fn in benchmarks.items() if args.filter in name}
+
+    results = {}
+    try:
+        for name, fn in benchmarks.items():
+            results[name] = measure(fn, args.repeat, args.min_time)
+    finally:
+        db.close()
+        if scratch is not None:
+            os.remove(scratch.name)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+    else:
+        for name, result in results.items():
+            print(f"{name:>40}: {result['best'] * 1e6:12.2f} us  (+/- {result['stdev'] * 1e6:.2f})")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, output_file, indent=2)
+
+    if regressions:
+        sys.exit(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
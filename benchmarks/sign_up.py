@@ -0,0 +1,154 @@
+"""
+Compare the latency of the multi-commit and the single-transaction sign-up.
+
+Runs the same number of sign-ups through the old path (existence check,
+then one commit per row, kept here as multi_commit_sign_up) and through
+sign_up_user_async, and prints latency percentiles together with the
+statements and commits issued per sign-up.
+
+Password hashing is replaced by a constant for the run, so the numbers show
+the database work only.
+
+Usage:
+    python -m benchmarks.sign_up --database-uri postgresql://localhost/elenchos_bench
+
+The tables of the target database are dropped and recreated when --reset is
+given; without it the script refuses to run on a database that has users.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+from time import perf_counter
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-uri", required=True, help="Scratch database to sign users up in.")
+    parser.add_argument("--runs", type=int, default=200, help="Sign-ups per path.")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the tables first.")
+    return parser.parse_args()
+
+
+class StatementCounter:
+    """
+    Count the statements and commits sent on an engine.
+    """
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_statement)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_statement(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+
+async def multi_commit_sign_up(db, email, organisation_name):
+    """
+    The sign-up path that sign_up_user_async replaced: an existence check,
+    then one commit per row.
+    """
+    from sqlalchemy import select
+
+    from app.core.models.member import Member
+    from app.core.models.organisation import Organisation
+    from app.core.models.role import Role
+    from app.core.models.user import User
+    from app.core.utils import auth
+    from app.core.utils.dependencies import save_and_refresh_async
+    from app.core.utils.errors import conflict_error
+    from app.core.utils.permissions import DEFAULT_ROLE_PERMISSIONS
+    from app.core.utils.stats import record_member_change_async
+
+    if await db.scalar(select(User.id).where(User.email == email)) is not None:
+        raise conflict_error("User")
+
+    user = User(email=email, password=await auth.get_password_hash_async("password"))
+    await save_and_refresh_async(db, user)
+
+    organisation = Organisation(name=organisation_name, status=1)
+    await save_and_refresh_async(db, organisation)
+
+    owner_role = Role(name="owner", org_id=organisation.id, permissions=DEFAULT_ROLE_PERMISSIONS["owner"])
+    await save_and_refresh_async(db, owner_role)
+    member_role = Role(name="member", org_id=organisation.id, permissions=DEFAULT_ROLE_PERMISSIONS["member"])
+    await save_and_refresh_async(db, member_role)
+
+    await record_member_change_async(db, organisation.id, owner_role.id, 1, 1)
+    await save_and_refresh_async(db, Member(org_id=organisation.id, user_id=user.id, role_id=owner_role.id, status=1))
+
+
+async def single_transaction_sign_up(db, email, organisation_name):
+    from app.core.utils import auth
+
+    await auth.sign_up_user_async(db, email, "password", organisation_name)
+
+
+async def run_path(name, sign_up, runs, counter):
+    from app.core.utils.database import AsyncSessionLocal
+
+    latencies = []
+    statements, commits = counter.statements, counter.commits
+    for n in range(runs):
+        async with AsyncSessionLocal() as db:
+            started = perf_counter()
+            await sign_up(db, f"{name}{n}@bench.test", f"Organisation {name} {n}")
+            latencies.append((perf_counter() - started) * 1000)
+
+    latencies.sort()
+    print(
+        f"{name:>20}: "
+        f"mean {statistics.mean(latencies):.3f} ms, "
+        f"p50 {latencies[len(latencies) // 2]:.3f} ms, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.3f} ms, "
+        f"{(counter.statements - statements) / runs:.1f} statements, "
+        f"{(counter.commits - commits) / runs:.1f} commits per sign-up"
+    )
+
+
+async def run(runs):
+    from app.core.utils import auth
+    from app.core.utils.database import async_engine
+
+    async def constant_hash(password):
+        return "$2b$12$benchmarkbenchmarkbenchmarkbenchmarkbenchmarkbenchm"
+
+    auth.get_password_hash_async = constant_hash
+    counter = StatementCounter(async_engine.sync_engine)
+
+    await run_path("multi_commit", multi_commit_sign_up, runs, counter)
+    await run_path("single_transaction", single_transaction_sign_up, runs, counter)
+    await async_engine.dispose()
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URI"] = args.database_uri
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from sqlalchemy import func, select
+
+    from app.core.utils.database import Base, engine
+    from app.core.models import user, member, role, organisation, invites, member_stats
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as connection:
+        if connection.execute(select(func.count()).select_from(user.User)).scalar():
+            sys.exit("The database already has users; run against a scratch database or pass --reset.")
+
+    asyncio.run(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
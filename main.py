@@ -1,17 +1,52 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.core.utils.database import Base, engine 
-from app.core.models import user, member, role, organisation, invites
+from app.core.models import user, member, role, organisation, invites, member_stats, revoked_token
 
 from app.api import auth, invitations, users, stats, membership
+from app.core.utils.metrics import render_prometheus
+from app.core.utils.middlewares import MetricsMiddleware
+from app.core.utils.hashing import hashing_executor
+from app.core.utils.smtp import smtp_pool
+from app.core.utils.templates import template_registry
+from app.core.utils.cron import job_scheduler
+from app.core.utils.stats import schedule_stats_reconciliation
+from app.core.utils.revocation import revocation_list, schedule_revocation_purge
+from app.core.utils.invite_sweep import schedule_invite_sweep
+from app.core.utils.rehash import rehash_queue
 
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop the worker-wide resources.
+    """
+    template_registry.load()
+    await job_scheduler.start()
+    schedule_stats_reconciliation(job_scheduler)
+    schedule_revocation_purge(job_scheduler)
+    schedule_invite_sweep(job_scheduler)
+    await revocation_list.start()
+    await rehash_queue.start()
+    yield
+    await rehash_queue.shutdown()
+    await revocation_list.shutdown()
+    await job_scheduler.shutdown()
+    await smtp_pool.close()
+    hashing_executor.shutdown()
+
 app = FastAPI(
     title="Elencho",
     description="RBAC API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(invitations.router)
@@ -28,3 +63,9 @@ def health_check():
         "message": "Elencho is up and running!"
         }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Request metrics and internal counters of the running worker, in the Prometheus text format.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,88 @@
+"""Baseline schema
+
+The tables were created by Base.metadata.create_all before migrations were
+introduced, and main.py still creates them on startup. On a database that
+already has them this revision only marks that schema as the starting
+point; on an empty database it creates the schema as it was then, so
+alembic upgrade head works from scratch.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("user"):
+        return
+
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("email", sa.String, nullable=False, unique=True),
+        sa.Column("password", sa.String, nullable=False),
+        sa.Column("profile", sa.JSON, nullable=False),
+        sa.Column("status", sa.Integer, nullable=False),
+        sa.Column("settings", sa.JSON, nullable=True),
+        sa.Column("created_at", sa.BigInteger, nullable=True),
+        sa.Column("updated_at", sa.BigInteger, nullable=True),
+    )
+    op.create_index("ix_user_id", "user", ["id"])
+
+    op.create_table(
+        "organisation",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("status", sa.Integer, nullable=False),
+        sa.Column("personal", sa.Boolean, nullable=True),
+        sa.Column("settings", sa.JSON, nullable=True),
+        sa.Column("created_at", sa.BigInteger, nullable=True),
+        sa.Column("updated_at", sa.BigInteger, nullable=True),
+    )
+    op.create_index("ix_organisation_id", "organisation", ["id"])
+
+    op.create_table(
+        "role",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("org_id", sa.Integer, sa.ForeignKey("organisation.id", ondelete="CASCADE"), nullable=False),
+    )
+    op.create_index("ix_role_id", "role", ["id"])
+
+    op.create_table(
+        "member",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("org_id", sa.Integer, sa.ForeignKey("organisation.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("user.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("role_id", sa.Integer, sa.ForeignKey("role.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("status", sa.Integer, nullable=False),
+        sa.Column("settings", sa.JSON, nullable=True),
+        sa.Column("created_at", sa.BigInteger, nullable=True),
+        sa.Column("updated_at", sa.BigInteger, nullable=True),
+    )
+    op.create_index("ix_member_id", "member", ["id"])
+
+    op.create_table(
+        "invites",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("email", sa.String, nullable=False),
+        sa.Column("organisation_id", sa.Integer, sa.ForeignKey("organisation.id")),
+        sa.Column("status", sa.String),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_invites_id", "invites", ["id"])
+
+
+def downgrade():
+    # Downgrading past the baseline leaves the tables in place, since they
+    # may predate the migrations.
+    pass
@@ -0,0 +1,47 @@
+"""Indexes for the hot lookup columns
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY outside
+a transaction, so live tables keep taking writes while they build. If a
+concurrent build fails it leaves an INVALID index behind; drop it before
+running the upgrade again.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_member_user_id_org_id", "member", "user_id, org_id", None),
+    ("ix_member_org_id_role_id", "member", "org_id, role_id", None),
+    ("ix_member_role_id", "member", "role_id", None),
+    ("ix_member_status_created_at", "member", "status, created_at", None),
+    ("ix_invites_email_status", "invites", "email, status", None),
+    ("ix_invites_pending_organisation_id_email", "invites", "organisation_id, email", "status = 'pending'"),
+    ("ix_role_org_id_name", "role", "org_id, name", None),
+]
+
+
+def upgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.execute(
+                f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+                f"ON {table} ({columns})"
+                f"{f' WHERE {where}' if where else ''}"
+            )
+
+
+def downgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        for name, _, _, _ in INDEXES:
+            op.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}")
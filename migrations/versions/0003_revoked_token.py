@@ -0,0 +1,36 @@
+"""Revocation store for access and refresh tokens
+
+main.py creates missing tables on startup, so the table may already exist
+when this revision runs; it is only created here when it does not.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("revoked_token"):
+        return
+
+    op.create_table(
+        "revoked_token",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("jti", sa.String, nullable=True),
+        sa.Column("subject", sa.String, nullable=True),
+        sa.Column("revoked_at", sa.Float, nullable=False),
+        sa.Column("expires_at", sa.Integer, nullable=False),
+    )
+    op.create_index("ix_revoked_token_expires_at", "revoked_token", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_revoked_token_expires_at", table_name="revoked_token")
+    op.drop_table("revoked_token")
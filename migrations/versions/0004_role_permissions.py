@@ -0,0 +1,41 @@
+"""Permission bitsets on roles
+
+Existing owner and member roles are given the permissions new organisations
+are created with. When main.py has already created the role table with the
+column, the roles it holds were created with their permissions and nothing
+is changed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Bitsets of the default roles at this revision; see app/core/utils/permissions.py.
+DEFAULT_ROLE_PERMISSIONS = {
+    "owner": 31,
+    "member": 25,
+}
+
+
+def upgrade():
+    columns = sa.inspect(op.get_bind()).get_columns("role")
+    if any(column["name"] == "permissions" for column in columns):
+        return
+
+    op.add_column("role", sa.Column("permissions", sa.BigInteger, nullable=False, server_default=sa.text("0")))
+
+    role = sa.table("role", sa.column("name", sa.String), sa.column("permissions", sa.BigInteger))
+    for name, permissions in DEFAULT_ROLE_PERMISSIONS.items():
+        op.execute(role.update().where(role.c.name == name).values(permissions=permissions))
+
+
+def downgrade():
+    with op.batch_alter_table("role") as batch_op:
+        batch_op.drop_column("permissions")
@@ -0,0 +1,33 @@
+"""Index for listing the members of an organisation
+
+Pages of /member/list are read in member id order within an organisation,
+so (org_id, id) lets each page start at its cursor instead of sorting every
+member of the organisation. Built like the indexes of 0002.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS ix_member_org_id_id "
+            f"ON member (org_id, id)"
+        )
+
+
+def downgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS ix_member_org_id_id")
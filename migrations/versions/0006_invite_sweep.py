@@ -0,0 +1,57 @@
+"""Index and archive table for the expired invite sweeper
+
+The sweeper finds expired pending invites and accepted invites through
+(status, expires_at); the index is built like the indexes of 0002. Swept
+invites are copied to invites_archive when INVITE_SWEEP_ARCHIVE is set;
+main.py creates that table on startup, so it is only created here when it
+does not exist yet.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("invites_archive"):
+        create_archive()
+
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS ix_invites_status_expires_at "
+            f"ON invites (status, expires_at)"
+        )
+
+
+def create_archive():
+    op.create_table(
+        "invites_archive",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("invite_id", sa.Integer, nullable=False),
+        sa.Column("email", sa.String, nullable=False),
+        sa.Column("organisation_id", sa.Integer, nullable=True),
+        sa.Column("status", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        sa.Column("archived_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_invites_archive_invite_id", "invites_archive", ["invite_id"])
+
+
+def downgrade():
+    concurrently = op.get_bind().dialect.name == "postgresql"
+
+    with op.get_context().autocommit_block():
+        op.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS ix_invites_status_expires_at")
+
+    op.drop_index("ix_invites_archive_invite_id", table_name="invites_archive")
+    op.drop_table("invites_archive")
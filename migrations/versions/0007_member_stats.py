@@ -0,0 +1,38 @@
+"""Member counters behind /stats
+
+The table is filled from the member table when it is created here. When
+main.py has already created it on startup, the first counter
+reconciliation, which runs as the scheduler starts, fills it instead.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("member_stats"):
+        return
+
+    op.create_table(
+        "member_stats",
+        sa.Column("org_id", sa.Integer, sa.ForeignKey("organisation.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("role_id", sa.Integer, sa.ForeignKey("role.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("status", sa.Integer, primary_key=True),
+        sa.Column("count", sa.BigInteger, nullable=False),
+    )
+    op.execute(
+        "INSERT INTO member_stats (org_id, role_id, status, count) "
+        "SELECT org_id, role_id, status, COUNT(id) FROM member GROUP BY org_id, role_id, status"
+    )
+
+
+def downgrade():
+    op.drop_table("member_stats")
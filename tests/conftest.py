@@ -0,0 +1,217 @@
+import os
+import socket
+import tempfile
+from uuid import uuid4
+
+import pytest
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# The app reads its configuration when it is imported, so the test settings
+# have to be in place before any app module is.
+_database = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+_database.close()
+
+os.environ["DATABASE_URI"] = f"sqlite:///{_database.name}"
+os.environ.pop("ASYNC_DATABASE_URI", None)
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ["HASH_EXECUTOR"] = "thread"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+os.environ["SMTP_HOST"] = "127.0.0.1"
+os.environ["SMTP_PORT"] = str(_free_port())
+os.environ["SMTP_USE_TLS"] = "false"
+os.environ["SMTP_START_TLS"] = "false"
+os.environ["APP_PASSWORD"] = ""
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if os.path.exists(_database.name):
+        os.remove(_database.name)
+
+
+class SMTPServer:
+    """
+    Local aiosmtpd server standing in for the SMTP relay.
+
+    Attributes:
+    messages (list) : Envelopes received, in order.
+    """
+
+    def __init__(self, port: int):
+        self.port = port
+        self.messages = []
+        self._controller = None
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+    def start(self):
+        from aiosmtpd.controller import Controller
+
+        self._controller = Controller(self, hostname="127.0.0.1", port=self.port)
+        self._controller.start()
+
+    def stop(self):
+        if self._controller is not None:
+            self._controller.stop()
+            self._controller = None
+
+    def restart(self):
+        """
+        Drop every open connection by stopping the server, then start it again.
+        """
+        self.stop()
+        self.start()
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPServer(int(os.environ["SMTP_PORT"]))
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def database():
+    from app.core.models import user, member, role, organisation, invites, member_stats, revoked_token
+    from app.core.utils.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+
+
+class Account:
+    """
+    User signed up through the API, with the organisation created for them.
+
+    Attributes:
+    email (str) : Email address of the user.
+    headers (dict) : Authorization header of the user.
+    org_id (int) : Id of the user's own organisation.
+    member_id (int) : Id of the user's owner membership.
+    """
+
+    def __init__(self, email: str, headers: dict, org_id: int, member_id: int):
+        self.email = email
+        self.headers = headers
+        self.org_id = org_id
+        self.member_id = member_id
+
+
+def _member_id(email: str, org_id: int):
+    from sqlalchemy import select
+
+    from app.core.models.member import Member
+    from app.core.models.user import User
+    from app.core.utils.database import SessionLocal
+
+    with SessionLocal() as db:
+        return db.scalar(
+            select(Member.id).join(User, User.id == Member.user_id).where(User.email == email, Member.org_id == org_id)
+        )
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+
+    import app.core.utils.mailers as mailers
+    import main
+
+    async def skip_email(*args, **kwargs):
+        pass
+
+    # Only the emails sent straight away are skipped; scheduled ones keep
+    # their reference to the real sender, which the job store needs.
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(mailers, "send_email", skip_email)
+
+        with TestClient(main.app) as client:
+            yield client
+
+
+@pytest.fixture
+def sign_up(client):
+    """
+    Sign up a new user with their own organisation.
+
+    Returns:
+    callable : Function taking an optional email prefix and returning an Account.
+    """
+    counter = iter(range(1, 1_000_000))
+
+    def sign_up(prefix: str = "user"):
+        email = f"{prefix}-{uuid4().hex[:12]}@example.com"
+        response = client.post(
+            "/auth/sign-up",
+            json={"email": email, "password": "password", "organisation_name": f"Organisation {next(counter)}"},
+        )
+        assert response.status_code == 201, response.text
+        org_id = response.json()["data"]["organization_id"]
+
+        response = client.post("/auth/sign-in", json={"email": email, "password": "password"})
+        assert response.status_code == 200, response.text
+        headers = {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+        return Account(email, headers, org_id, _member_id(email, org_id))
+
+    return sign_up
+
+
+@pytest.fixture
+def join(client):
+    """
+    Make a user a member of another organisation through an accepted invite.
+
+    Returns:
+    callable : Function taking the inviting owner and the invitee Accounts, returning the new member id.
+    """
+    from sqlalchemy import select
+
+    from app.core.models.invites import Invite
+    from app.core.utils.database import SessionLocal
+    from app.core.utils.invitation import create_invite_token
+
+    def join(owner: Account, invitee: Account):
+        response = client.post(
+            "/invitations/send",
+            json={"organisation_id": owner.org_id, "recipient_mail": invitee.email},
+            headers=owner.headers,
+        )
+        assert response.status_code == 200, response.text
+
+        with SessionLocal() as db:
+            invite_id = db.scalar(
+                select(Invite.id).where(Invite.organisation_id == owner.org_id, Invite.email == invitee.email)
+            )
+        response = client.get(
+            "/invitations/accept",
+            params={"invite_id": create_invite_token(invitee.email, invite_id)},
+            headers=invitee.headers,
+        )
+        assert response.json() == {"message": "Invite accepted successfully"}
+        return _member_id(invitee.email, owner.org_id)
+
+    return join
+
+
+@pytest.fixture
+def sign_in(client):
+    """
+    Sign an Account in again.
+
+    Returns:
+    callable : Function taking an Account and an optional password, returning the issued tokens.
+    """
+    def sign_in(account: Account, password: str = "password"):
+        response = client.post("/auth/sign-in", json={"email": account.email, "password": password})
+        assert response.status_code == 200, response.text
+        return response.json()["data"]
+
+    return sign_in
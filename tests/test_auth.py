@@ -0,0 +1,25 @@
+def bearer(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def list_members(client, account, token: str):
+    return client.get("/member/list", params={"org_id": account.org_id, "fields": "id"}, headers=bearer(token))
+
+
+def test_refresh_issues_working_access_token(client, sign_up, sign_in):
+    account = sign_up()
+    tokens = sign_in(account)
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()["data"]
+    assert list_members(client, account, refreshed["access_token"]).status_code == 200
+
+
+def test_refresh_token_is_not_an_access_token(client, sign_up, sign_in):
+    account = sign_up()
+    tokens = sign_in(account)
+
+    assert list_members(client, account, tokens["refresh_token"]).status_code == 401
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
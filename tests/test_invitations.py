@@ -0,0 +1,28 @@
+from sqlalchemy import select
+
+from app.core.models.invites import Invite
+from app.core.utils.database import SessionLocal
+from app.core.utils.invitation import create_invite_token
+
+
+def invite(client, owner, email):
+    response = client.post(
+        "/invitations/send", json={"organisation_id": owner.org_id, "recipient_mail": email}, headers=owner.headers
+    )
+    assert response.status_code == 200, response.text
+    with SessionLocal() as db:
+        return db.scalar(select(Invite.id).where(Invite.organisation_id == owner.org_id, Invite.email == email))
+
+
+def test_invite_token_must_name_the_invitee(client, sign_up):
+    owner, invitee, other = sign_up("owner"), sign_up("invitee"), sign_up("other")
+    invite_id = invite(client, owner, invitee.email)
+
+    for path in ("/invitations/accept", "/invitations/cancel"):
+        response = client.get(path, params={"invite_id": create_invite_token(other.email, invite_id)}, headers=other.headers)
+        assert response.json() == {"message": "Invalid or expired invite!"}
+
+    response = client.get(
+        "/invitations/cancel", params={"invite_id": create_invite_token(invitee.email, invite_id)}, headers=invitee.headers
+    )
+    assert response.json() == {"message": "Invite cancelled successfully"}
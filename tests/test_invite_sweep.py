@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete
+
+from app.core.models.invites import Invite, InviteArchive
+from app.core.utils.database import AsyncSessionLocal
+from app.core.utils.invite_sweep import InviteSweeper
+
+
+def expired_invite(invite_id: int, email: str):
+    now = datetime.utcnow()
+    return Invite(
+        id=invite_id, email=email, status="pending", created_at=now - timedelta(days=10), expires_at=now - timedelta(days=3)
+    )
+
+
+def test_sweep_archives_reused_invite_ids(database):
+    sweeper = InviteSweeper(10, 30, timedelta(days=1), True)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Invite))
+            await db.execute(delete(InviteArchive))
+            await db.commit()
+
+            invite_id = 1_000_000
+            db.add(expired_invite(invite_id, "first@elenchos.test"))
+            await db.commit()
+            await sweeper.run()
+
+            # SQLite hands the id out again once the row is gone.
+            db.add(expired_invite(invite_id, "second@elenchos.test"))
+            await db.commit()
+            await sweeper.run()
+
+            return (await db.execute(
+                select(InviteArchive.invite_id, InviteArchive.email).order_by(InviteArchive.id)
+            )).all(), await db.scalar(select(Invite.id).where(Invite.id == invite_id))
+
+    archived, remaining = asyncio.run(scenario())
+
+    assert sweeper.failures == 0
+    assert sweeper.swept_expired == 2
+    assert [tuple(row) for row in archived] == [(1_000_000, "first@elenchos.test"), (1_000_000, "second@elenchos.test")]
+    assert remaining is None
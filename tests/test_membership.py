@@ -0,0 +1,100 @@
+def outcomes(response):
+    assert response.status_code == 200, response.text
+    return [(result["member_id"], result["status"]) for result in response.json()["results"]]
+
+
+def update_roles(client, owner, member_ids, role_name):
+    return client.post(
+        "/member/update-role-bulk",
+        json={"organisation_id": owner.org_id, "member_ids": member_ids, "role_name": role_name},
+        headers=owner.headers,
+    )
+
+
+def delete_members(client, owner, member_ids):
+    return client.post(
+        "/member/delete-bulk",
+        json={"organisation_id": owner.org_id, "member_ids": member_ids},
+        headers=owner.headers,
+    )
+
+
+def test_bulk_update_reports_every_id(client, sign_up, join):
+    owner = sign_up("owner")
+    first = join(owner, sign_up("first"))
+    second = join(owner, sign_up("second"))
+    missing = second + 1_000_000
+
+    response = update_roles(client, owner, [first, missing, first, second], "owner")
+    assert outcomes(response) == [(first, "updated"), (missing, "not_found"), (first, "duplicate"), (second, "updated")]
+
+    response = update_roles(client, owner, [first, second], "owner")
+    assert outcomes(response) == [(first, "unchanged"), (second, "unchanged")]
+
+
+def test_bulk_update_keeps_the_last_managers(client, sign_up, join):
+    owner = sign_up("owner")
+    member = join(owner, sign_up("member"))
+    update_roles(client, owner, [member], "owner")
+
+    response = update_roles(client, owner, [owner.member_id, member], "member")
+    assert outcomes(response) == [(owner.member_id, "last_manager"), (member, "last_manager")]
+
+    response = update_roles(client, owner, [member], "member")
+    assert outcomes(response) == [(member, "updated")]
+
+    response = update_roles(client, owner, [owner.member_id], "member")
+    assert outcomes(response) == [(owner.member_id, "last_manager")]
+
+
+def test_bulk_delete_reports_every_id(client, sign_up, join):
+    owner = sign_up("owner")
+    first = join(owner, sign_up("first"))
+    second = join(owner, sign_up("second"))
+    missing = second + 1_000_000
+
+    response = delete_members(client, owner, [first, missing, first, owner.member_id, second])
+    assert outcomes(response) == [
+        (first, "deleted"), (missing, "not_found"), (first, "duplicate"), (owner.member_id, "last_manager"), (second, "deleted"),
+    ]
+
+    response = delete_members(client, owner, [first])
+    assert outcomes(response) == [(first, "not_found")]
+
+
+def test_bulk_delete_keeps_one_of_several_managers_only_when_needed(client, sign_up, join):
+    owner = sign_up("owner")
+    manager = join(owner, sign_up("manager"))
+    update_roles(client, owner, [manager], "owner")
+
+    response = delete_members(client, owner, [manager])
+    assert outcomes(response) == [(manager, "deleted")]
+
+    response = delete_members(client, owner, [owner.member_id])
+    assert outcomes(response) == [(owner.member_id, "last_manager")]
+
+
+def test_single_changes_keep_the_last_manager(client, sign_up, join):
+    owner = sign_up("owner")
+    member = join(owner, sign_up("member"))
+
+    response = client.delete(f"/member/delete/{owner.member_id}", headers=owner.headers)
+    assert response.status_code == 409
+    assert response.json()["detail"][0]["type"] == "last_manager_error"
+
+    response = client.post(
+        "/member/update-role", json={"member_id": owner.member_id, "role_name": "member"}, headers=owner.headers
+    )
+    assert response.status_code == 409
+
+    response = client.post("/member/update-role", json={"member_id": member, "role_name": "owner"}, headers=owner.headers)
+    assert response.status_code == 200
+    response = client.post(
+        "/member/update-role", json={"member_id": owner.member_id, "role_name": "member"}, headers=owner.headers
+    )
+    assert response.status_code == 200
+
+    response = client.delete(f"/member/delete/{member}", headers=owner.headers)
+    assert response.status_code == 401
+    response = client.delete(f"/member/delete/{owner.member_id}", headers=sign_up("outsider").headers)
+    assert response.status_code == 401
@@ -0,0 +1,23 @@
+import pytest
+
+from app.core.utils.errors import APIError
+from app.core.utils.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["Organisation", 42, "owner"])
+
+    assert decode_cursor(cursor, [str, int, str]) == ["Organisation", 42, "owner"]
+
+
+@pytest.mark.parametrize("cursor, types", [
+    (encode_cursor(["x"]), [int]),
+    (encode_cursor([True]), [int]),
+    (encode_cursor([1, "a"]), [str, int]),
+    (encode_cursor([1]), [int, int]),
+    (encode_cursor({"id": 1}), [int]),
+    ("not a cursor", [int]),
+])
+def test_invalid_cursor_is_rejected(cursor, types):
+    with pytest.raises(APIError):
+        decode_cursor(cursor, types)
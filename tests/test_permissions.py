@@ -0,0 +1,111 @@
+import pytest
+
+from app.core.utils.errors import APIError
+from app.core.utils.permissions import Permission, ALL_PERMISSIONS, DEFAULT_ROLE_PERMISSIONS, Authorizer
+
+
+def test_default_roles():
+    assert DEFAULT_ROLE_PERMISSIONS["owner"] == ALL_PERMISSIONS
+
+    member = Authorizer({1: DEFAULT_ROLE_PERMISSIONS["member"]})
+    assert member.can(1, Permission.INVITE_MEMBERS | Permission.VIEW_MEMBERS | Permission.VIEW_STATS)
+    assert not member.can(1, Permission.MANAGE_ROLES)
+    assert not member.can(1, Permission.REMOVE_MEMBERS)
+
+
+def test_authorizer_checks():
+    authorizer = Authorizer({1: int(ALL_PERMISSIONS), 2: int(Permission.VIEW_STATS)})
+
+    assert authorizer.permissions(3) == 0
+    assert authorizer.can(1, Permission.MANAGE_ROLES | Permission.REMOVE_MEMBERS)
+    assert not authorizer.can(2, Permission.VIEW_STATS | Permission.VIEW_MEMBERS)
+    assert authorizer.orgs_with(Permission.VIEW_STATS) == [1, 2]
+    assert authorizer.require_any(Permission.MANAGE_ROLES) == [1]
+
+    authorizer.require(2, Permission.VIEW_STATS)
+    with pytest.raises(APIError) as error:
+        authorizer.require(3, Permission.VIEW_STATS)
+    assert error.value.status_code == 401
+    with pytest.raises(APIError):
+        Authorizer({}).require_any(Permission.VIEW_STATS)
+
+
+@pytest.fixture
+def organisation(sign_up, join):
+    """
+    Organisation with an owner and a member who owns another organisation.
+
+    Returns:
+    tuple : Owner Account, member Account and the member's id in the owner's organisation.
+    """
+    owner, member = sign_up("owner"), sign_up("member")
+    return owner, member, join(owner, member)
+
+
+def test_member_cannot_manage_roles_or_remove_members(client, organisation):
+    owner, member, member_id = organisation
+
+    response = client.post(
+        "/member/update-role", json={"member_id": owner.member_id, "role_name": "member"}, headers=member.headers
+    )
+    assert response.status_code == 401
+    response = client.delete(f"/member/delete/{owner.member_id}", headers=member.headers)
+    assert response.status_code == 401
+    response = client.post(
+        "/member/update-role-bulk",
+        json={"organisation_id": owner.org_id, "member_ids": [member_id], "role_name": "owner"},
+        headers=member.headers,
+    )
+    assert response.status_code == 401
+    response = client.post(
+        "/member/delete-bulk", json={"organisation_id": owner.org_id, "member_ids": [owner.member_id]}, headers=member.headers
+    )
+    assert response.status_code == 401
+
+    response = client.post(
+        "/member/update-role", json={"member_id": member_id, "role_name": "owner"}, headers=owner.headers
+    )
+    assert response.status_code == 200
+
+
+def test_member_can_invite_and_list_members(client, sign_up, organisation):
+    owner, member, member_id = organisation
+
+    response = client.post(
+        "/invitations/send",
+        json={"organisation_id": owner.org_id, "recipient_mail": sign_up("invitee").email},
+        headers=member.headers,
+    )
+    assert response.status_code == 200
+
+    response = client.get("/member/list", params={"org_id": owner.org_id, "fields": "id"}, headers=member.headers)
+    assert response.status_code == 200
+    assert response.json()["members"] == [[owner.member_id], [member_id]]
+
+
+def test_outsider_cannot_invite_or_list_members(client, sign_up, organisation):
+    owner, member, member_id = organisation
+    outsider = sign_up("outsider")
+
+    response = client.post(
+        "/invitations/send",
+        json={"organisation_id": owner.org_id, "recipient_mail": sign_up("invitee").email},
+        headers=outsider.headers,
+    )
+    assert response.status_code == 401
+    response = client.get("/member/list", params={"org_id": owner.org_id}, headers=outsider.headers)
+    assert response.status_code == 401
+    response = client.delete(f"/member/delete/{member_id}", headers=outsider.headers)
+    assert response.status_code == 401
+
+
+def test_stats_cover_only_the_callers_organisations(client, sign_up, organisation):
+    owner, member, member_id = organisation
+    sign_up("outsider")
+
+    response = client.get("/stats/organization-members", params={"fields": "id,count"}, headers=member.headers)
+    assert response.status_code == 200
+    assert response.json()["organization_wise_members"] == sorted([[owner.org_id, 2], [member.org_id, 1]])
+
+    response = client.get("/stats/organization-members", params={"fields": "id"}, headers=owner.headers)
+    assert response.json()["organization_wise_members"] == [[owner.org_id]]
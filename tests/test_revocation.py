@@ -0,0 +1,76 @@
+from time import time
+
+from app.core.utils.revocation import BloomFilter, RevocationList
+
+
+def bearer(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def list_members(client, account, token: str):
+    return client.get("/member/list", params={"org_id": account.org_id, "fields": "id"}, headers=bearer(token))
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1 << 12, 5)
+    keys = [f"jti-{n}" for n in range(200)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert sum(f"other-{n}" in bloom for n in range(1000)) < 50
+
+
+def test_revocation_list_checks_the_exact_set_behind_the_filter():
+    revocations = RevocationList(5, 64, 1)
+    revocations._add("revoked", None, time(), int(time()) + 60)
+
+    # A tiny filter makes a key that was never revoked collide with one that was.
+    kept = next(f"kept-{n}" for n in range(1000) if f"kept-{n}" in revocations._bloom)
+    assert not revocations.is_revoked(kept, "user@example.com", time())
+    assert revocations.bloom_false_positives == 1
+    assert revocations.is_revoked("revoked", "user@example.com", time())
+
+
+def test_revocation_list_revokes_tokens_issued_before_a_subject_revocation():
+    revocations = RevocationList(5, 1 << 10, 3)
+    revoked_at = time()
+    revocations._add(None, "user@example.com", revoked_at, int(revoked_at) + 60)
+
+    assert revocations.is_revoked("old", "user@example.com", revoked_at - 1)
+    assert not revocations.is_revoked("new", "user@example.com", revoked_at + 1)
+    assert not revocations.is_revoked("old", "other@example.com", revoked_at - 1)
+
+    revocations._expire(int(revoked_at) + 60)
+    assert not revocations.is_revoked("old", "user@example.com", revoked_at - 1)
+
+
+def test_rotated_refresh_token_cannot_be_used_again(client, sign_up, sign_in):
+    account = sign_up()
+    refresh_token = sign_in(account)["refresh_token"]
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    rotated = response.json()["data"]["refresh_token"]
+    assert rotated != refresh_token
+
+    assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": rotated}).status_code == 200
+
+
+def test_password_reset_revokes_every_earlier_token(client, sign_up, sign_in):
+    account = sign_up()
+    tokens = sign_in(account)
+    assert list_members(client, account, tokens["access_token"]).status_code == 200
+
+    response = client.post(
+        "/users/reset-password", json={"email": account.email, "password": "changed"}, headers=bearer(tokens["access_token"])
+    )
+    assert response.status_code == 200
+
+    assert list_members(client, account, tokens["access_token"]).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert client.get("/member/list", params={"org_id": account.org_id}, headers=account.headers).status_code == 401
+
+    fresh = sign_in(account, "changed")
+    assert list_members(client, account, fresh["access_token"]).status_code == 200
@@ -0,0 +1,74 @@
+import asyncio
+from email import message_from_bytes
+from email.mime.text import MIMEText
+
+from app.core.utils.smtp import SMTPPool
+from app.core.utils.mailers import run_in_task_loop
+
+
+def make_message(subject: str):
+    message = MIMEText(subject, "plain")
+    message["Subject"] = subject
+    message["From"] = "sender@elenchos.test"
+    message["To"] = "recipient@elenchos.test"
+    return message
+
+
+def subjects(server):
+    return [message_from_bytes(envelope.content)["Subject"] for envelope in server.messages]
+
+
+def test_pool_reuses_connection(smtp_server):
+    pool = SMTPPool(1, 30, 240)
+
+    async def scenario():
+        await pool.send(make_message("first"))
+        await pool.send(make_message("second"))
+        await pool.close()
+
+    asyncio.run(scenario())
+
+    assert subjects(smtp_server) == ["first", "second"]
+    assert smtp_server.messages[0].rcpt_tos == ["recipient@elenchos.test"]
+    assert pool.stats()["connects"] == 1
+    assert pool.stats()["reuses"] == 1
+    assert pool.stats()["sent"] == 2
+
+
+def test_pool_reconnects_after_server_drops_connection(smtp_server):
+    pool = SMTPPool(1, 30, 240)
+
+    async def scenario():
+        await pool.send(make_message("before"))
+        smtp_server.restart()
+        await pool.send(make_message("after"))
+        await pool.close()
+
+    asyncio.run(scenario())
+
+    assert subjects(smtp_server) == ["before", "after"]
+    assert pool.stats()["connects"] == 2
+    assert pool.stats()["failed"] == 0
+
+
+def test_pool_closes_connections_of_a_previous_loop(smtp_server):
+    pool = SMTPPool(1, 30, 240)
+
+    asyncio.run(pool.send(make_message("first loop")))
+    asyncio.run(pool.send(make_message("second loop")))
+
+    assert subjects(smtp_server) == ["first loop", "second loop"]
+    assert pool.stats()["abandoned"] == 1
+    assert pool.stats()["connects"] == 2
+
+
+def test_task_loop_keeps_connections_between_tasks(smtp_server):
+    pool = SMTPPool(1, 30, 240)
+
+    run_in_task_loop(pool.send(make_message("first task")))
+    run_in_task_loop(pool.send(make_message("second task")))
+    run_in_task_loop(pool.close())
+
+    assert subjects(smtp_server) == ["first task", "second task"]
+    assert pool.stats()["connects"] == 1
+    assert pool.stats()["abandoned"] == 0
@@ -0,0 +1,38 @@
+import asyncio
+
+from sqlalchemy import select, update
+
+from app.core.models.member_stats import MemberStats
+from app.core.utils.database import AsyncSessionLocal
+from app.core.utils.stats import reconcile_member_stats
+
+
+def counters(org_id: int):
+    async def read():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(
+                select(MemberStats.role_id, MemberStats.status, MemberStats.count)
+                .where(MemberStats.org_id == org_id)
+                .order_by(MemberStats.role_id, MemberStats.status)
+            )).all()
+
+    return [tuple(row) for row in asyncio.run(read())]
+
+
+def test_reconcile_corrects_drifted_counters(client, sign_up, join):
+    owner = sign_up("owner")
+    join(owner, sign_up("member"))
+    expected = counters(owner.org_id)
+    assert sorted(count for _, _, count in expected) == [1, 1]
+
+    async def drift():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(MemberStats).where(MemberStats.org_id == owner.org_id).values(count=MemberStats.count + 5))
+            await db.execute(MemberStats.__table__.insert().values(org_id=owner.org_id, role_id=expected[0][0], status=99, count=3))
+            await db.commit()
+
+    asyncio.run(drift())
+    assert counters(owner.org_id) != expected
+
+    asyncio.run(reconcile_member_stats())
+    assert counters(owner.org_id) == expected